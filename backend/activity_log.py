@@ -0,0 +1,128 @@
+"""Buffered, batched writer for the activity log.
+
+Recording an activity appends the entry to an in-memory buffer and returns,
+so the request it describes never waits on Mongo. A background task writes
+the buffer with insert_many whenever it holds a full batch, and at least
+every flush_interval seconds otherwise. stop() drains what is left on
+shutdown. The buffer is bounded. When it is full, new entries are dropped
+(and counted) under the "drop" policy, or the caller waits for room under
+the "block" policy. A batch that fails to write is put back and retried.
+Entries that already reached the database are skipped as duplicates.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP = "drop"
+OVERFLOW_BLOCK = "block"
+DUPLICATE_KEY = 11000
+
+
+class ActivityLogWriter:
+    def __init__(self, collection, batch_size: int = 200, flush_interval: float = 1,
+                 max_buffer: int = 10000, overflow: str = OVERFLOW_DROP):
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.overflow = overflow
+        self.dropped = 0
+        self._buffer = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+
+    @property
+    def pending(self) -> int:
+        """Entries waiting to be written"""
+        return len(self._buffer)
+
+    async def log(self, entry: dict):
+        """Queue an entry; only waits if the buffer is full and the policy is "block" """
+        if len(self._buffer) >= self.max_buffer:
+            if self.overflow == OVERFLOW_DROP or self._space is None:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning(f"Activity log buffer full, {self.dropped} entries dropped so far")
+                return
+            async with self._space:
+                await self._space.wait_for(lambda: len(self._buffer) < self.max_buffer)
+        self._buffer.append(entry)
+        if self._batch_ready and len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> bool:
+        """Write one batch; returns False if the write failed and the batch was put back"""
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if not batch:
+            return True
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            failed = [
+                batch[error["index"]] for error in e.details.get("writeErrors", [])
+                if error.get("code") != DUPLICATE_KEY
+            ]
+            if failed:
+                self._requeue(failed, e)
+                return False
+        except Exception as e:
+            self._requeue(batch, e)
+            return False
+        finally:
+            if self._space is not None:
+                async with self._space:
+                    self._space.notify_all()
+        return True
+
+    def _requeue(self, entries: list, error: Exception):
+        # Put the batch back at the front; with a full buffer the oldest failed entries are given up
+        room = max(self.max_buffer - len(self._buffer), 0)
+        lost = len(entries) - room
+        if lost > 0:
+            self.dropped += lost
+            entries = entries[lost:]
+        self._buffer.extendleft(reversed(entries))
+        logger.error(f"Error writing {len(entries)} activity log entries, will retry: {str(error)}")
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            while self._buffer:
+                if not await self.flush():
+                    break
+                if len(self._buffer) < self.batch_size and not self._closing:
+                    # A partial batch waits for the next interval
+                    break
+
+    def start(self):
+        self._closing = False
+        self._batch_ready = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write everything still buffered"""
+        if self._task:
+            # Let the task finish its current write and drain rather than cancelling it mid-batch
+            self._closing = True
+            self._batch_ready.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._buffer:
+            if not await self.flush():
+                logger.error(f"Dropping {len(self._buffer)} activity log entries at shutdown")
+                self._buffer.clear()
+                break
@@ -0,0 +1,87 @@
+"""Per-process cache of decoded images used by the PDF generator.
+
+Logos, the cover image and product thumbnails are decoded once and shared by
+every render in the process. Entries are keyed by path and mtime, so a
+replaced file is picked up on the next lookup, and the cache is bounded by
+the size of the decoded pixel data.
+"""
+import os
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+
+
+def mtime_ns(path) -> Optional[int]:
+    """Modification time of the file at path, or None if it does not exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class CachedImage(NamedTuple):
+    reader: ImageReader
+    width: int
+    height: int
+    nbytes: int
+
+
+class ImageCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, path) -> Optional[CachedImage]:
+        """Return the decoded image at path, or None if the file does not exist"""
+        path = str(path)
+        mtime = mtime_ns(path)
+        if mtime is None:
+            self._discard(path)
+            return None
+
+        key = (path, mtime)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = self._load(path)
+        self._discard(path)
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        self._evict()
+        return entry
+
+    def _load(self, path: str) -> CachedImage:
+        data = Path(path).read_bytes()
+        with PILImage.open(BytesIO(data)) as img:
+            has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+        reader = ImageReader(BytesIO(data))
+        # Decode now so the pixel data (and alpha mask) is shared by every later draw
+        reader.getRGBData()
+        width, height = reader.getSize()
+        nbytes = width * height * (4 if has_alpha else 3)
+        return CachedImage(reader, width, height, nbytes)
+
+    def _discard(self, path: str):
+        """Drop entries for an older version of path"""
+        for key in [key for key in self._entries if key[0] == path]:
+            self._bytes -= self._entries.pop(key).nbytes
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+
+image_cache = ImageCache(int(os.environ.get('PDF_IMAGE_CACHE_BYTES', 64 * 1024 * 1024)))
@@ -0,0 +1,172 @@
+"""MongoDB indexes required by the API.
+
+Every collection is looked up by its application-level `id`, and list
+endpoints page on (sort field, id), so each gets a unique `id` index plus a
+compound index matching its default listing order. Indexes a newer one
+replaces are listed in RETIRED_INDEXES and dropped at startup. Append-only logs expire
+through a TTL index whose retention comes from the environment, so they stay
+bounded without a cleanup job. ensure_indexes() runs at startup; creating an
+index that already exists is a no-op, so it is safe on every boot. It can also be run by hand:
+
+    python indexes.py
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "quotations": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("quote_number", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("created_by", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("assigned_to", ASCENDING)]),
+    ],
+    "invoices": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("invoice_number", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "products": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("model_no", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "contact_submissions": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "settings": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "status_checks": [
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "activity_logs": [
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("action", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("resource_type", ASCENDING), ("resource_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "email_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)]),
+    ],
+}
+
+# Collections expired by a TTL index: collection -> (date field, retention env var, default days).
+# A retention of 0 keeps documents forever and drops the TTL index.
+TTL_INDEXES = {
+    "activity_logs": ("timestamp", "ACTIVITY_LOG_RETENTION_DAYS", 365),
+}
+
+# Indexes replaced by a declared one: collection -> index names dropped at startup if present
+RETIRED_INDEXES = {
+    "activity_logs": ["timestamp_-1"],  # superseded by (timestamp, id)
+}
+
+# Server error codes for an index that exists with other options
+INDEX_CONFLICT_CODES = (85, 86)
+
+
+async def ensure_ttl_index(db, collection: str, report: dict) -> str:
+    """Create, retune or drop the collection's TTL index to match the configured retention; returns its name"""
+    field, env_var, default_days = TTL_INDEXES[collection]
+    name = f"{field}_ttl"
+    days = int(os.environ.get(env_var, default_days))
+    if days <= 0:
+        if name in await db[collection].index_information():
+            await db[collection].drop_index(name)
+            logger.info(f"Dropped TTL index {collection}.{name}; {env_var} is 0")
+        return name
+
+    seconds = days * 86400
+    try:
+        await db[collection].create_indexes([IndexModel([(field, ASCENDING)], name=name, expireAfterSeconds=seconds)])
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            report["missing"].append(f"{collection}.{name}")
+            logger.error(f"Could not create index {collection}.{name}: {e}")
+            return name
+        # The retention changed; collMod updates the expiry in place
+        await db.command("collMod", collection, index={"name": name, "expireAfterSeconds": seconds})
+        logger.info(f"TTL index {collection}.{name} now expires documents after {days} days")
+    return name
+
+
+async def ensure_indexes(db) -> dict:
+    """Create the declared indexes and log any that are missing, undeclared or unused.
+
+    Returns {"missing": [...], "undeclared": [...], "unused": [...]} as
+    "collection.index_name" strings. A failing index (e.g. duplicate values
+    under a unique key) is reported as missing instead of stopping startup.
+    """
+    report = {"missing": [], "undeclared": [], "unused": []}
+    for collection, models in INDEXES.items():
+        declared = {"_id_"}
+        existing = await db[collection].index_information()
+        for name in RETIRED_INDEXES.get(collection, []):
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info(f"Dropped retired index {collection}.{name}")
+        for model in models:
+            name = model.document["name"]
+            declared.add(name)
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                report["missing"].append(f"{collection}.{name}")
+                logger.error(f"Could not create index {collection}.{name}: {e}")
+        if collection in TTL_INDEXES:
+            declared.add(await ensure_ttl_index(db, collection, report))
+
+        existing = await db[collection].index_information()
+        report["undeclared"] += [f"{collection}.{name}" for name in existing if name not in declared]
+
+        try:
+            stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        except OperationFailure:
+            stats = []  # $indexStats needs the clusterMonitor role
+        report["unused"] += [
+            f"{collection}.{stat['name']}" for stat in stats
+            if stat["name"] != "_id_" and stat.get("accesses", {}).get("ops", 0) == 0
+        ]
+
+    if report["missing"]:
+        logger.warning(f"Missing indexes: {', '.join(report['missing'])}")
+    if report["undeclared"]:
+        logger.warning(f"Indexes not declared in indexes.py: {', '.join(report['undeclared'])}")
+    if report["unused"]:
+        logger.info(f"Indexes unused since the server started: {', '.join(report['unused'])}")
+    return report
+
+
+async def main():
+    root_dir = Path(__file__).parent
+    load_dotenv(root_dir / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        await ensure_indexes(client[os.environ['DB_NAME']])
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
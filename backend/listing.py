@@ -0,0 +1,104 @@
+"""Keyset-paginated list endpoints.
+
+Every list endpoint reads one bounded page with a summary projection, sorted by
+a whitelisted field with `id` as the tie-breaker. Documents are serialized one
+at a time as they come off the Mongo cursor, and the cursor for the next page
+is returned in the X-Next-Cursor header so the response body stays a plain
+JSON array.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def summary_projection(model: Type[BaseModel]) -> dict:
+    """Mongo projection returning only the fields of model"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+
+def encode_cursor(sort: str, doc: dict) -> str:
+    field = sort.lstrip('-')
+    value = doc.get(field)
+    data = {"sort": sort, "value": value, "id": doc["id"]}
+    if isinstance(value, datetime):
+        data.update(value=value.isoformat(), type="datetime")
+    raw = json.dumps(data).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value, doc_id = data["value"], str(data["id"])
+        if data.get("type") == "datetime":
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if data.get("sort") != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return value, doc_id
+
+
+def parse_sort(sort: str, sortable: Iterable[str]) -> tuple:
+    """Split "-field" into (field, direction), rejecting fields outside the whitelist"""
+    field = sort.lstrip('-')
+    if field not in sortable:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {field}; allowed: {', '.join(sortable)}")
+    return field, -1 if sort.startswith('-') else 1
+
+
+async def paginate(
+    collection,
+    query: dict,
+    model: Type[BaseModel],
+    *,
+    sort: str,
+    sortable: Iterable[str],
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> Response:
+    """One page of collection as a JSON array of model, newest first for "-field" sorts"""
+    field, direction = parse_sort(sort, sortable)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if cursor:
+        value, doc_id = decode_cursor(cursor, sort)
+        op = "$lt" if direction < 0 else "$gt"
+        after = {"$or": [{field: {op: value}}, {field: value, "id": {op: doc_id}}]}
+        query = {"$and": [query, after]} if query else after
+
+    find = collection.find(query, projection or summary_projection(model))
+    find = find.sort([(field, direction), ("id", direction)]).limit(limit + 1)
+
+    chunks = []
+    last = None
+    has_more = False
+    async for doc in find:
+        if len(chunks) == limit:
+            has_more = True
+            break
+        chunks.append(model.model_validate(doc).model_dump_json().encode('utf-8'))
+        last = doc
+
+    response = Response(b"[" + b",".join(chunks) + b"]", media_type="application/json")
+    if has_more:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, last)
+    return response
+
+
+def datetime_bound(value: datetime) -> datetime:
+    """Date range filter bound, reading naive datetimes as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -0,0 +1,134 @@
+"""Minimal local SMTP server for development and tests.
+
+Accepts any login and keeps every delivered message in memory instead of
+sending it anywhere. Addresses in refused_recipients get a 550 reply, and
+`connections` counts the sessions opened. Point the API at it with:
+
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false
+
+and run it standalone with `python local_smtp.py [port]`, or start it inside
+a test's event loop and inspect `server.messages`.
+"""
+import asyncio
+import email
+import logging
+import sys
+from email.message import Message
+from email.policy import default as default_policy
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSMTPServer:
+    def __init__(self, host: str = 'localhost', port: int = 1025, refused_recipients: Iterable[str] = ()):
+        self.host = host
+        self.port = port
+        self.refused_recipients = {address.lower() for address in refused_recipients}
+        self.messages: List[Message] = []
+        self.connections = 0  # sessions opened so far, to check that clients reuse them
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode('ascii'))
+
+        self.connections += 1
+        reply("220 localhost InHaus local SMTP")
+        recipients = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, arg = line.decode('utf-8', 'replace').strip().partition(' ')
+                command = command.upper()
+
+                if command == 'EHLO':
+                    reply("250-localhost")
+                    reply("250-8BITMIME")
+                    reply("250 AUTH PLAIN LOGIN")
+                elif command == 'HELO':
+                    reply("250 localhost")
+                elif command == 'AUTH':
+                    mechanism, _, initial = arg.partition(' ')
+                    if mechanism.upper() == 'LOGIN':
+                        for prompt in ([] if initial else ["VXNlcm5hbWU6"]) + ["UGFzc3dvcmQ6"]:
+                            reply(f"334 {prompt}")
+                            await writer.drain()
+                            await reader.readline()
+                    elif not initial:
+                        reply("334 ")
+                        await writer.drain()
+                        await reader.readline()
+                    reply("235 Authentication successful")
+                elif command == 'MAIL':
+                    recipients = []
+                    reply("250 OK")
+                elif command == 'RCPT':
+                    address = arg.partition(':')[2].strip().strip('<>')
+                    if address.lower() in self.refused_recipients:
+                        reply("550 Mailbox unavailable")
+                    else:
+                        recipients.append(address)
+                        reply("250 OK")
+                elif command == 'DATA':
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    lines = []
+                    while True:
+                        data = await reader.readline()
+                        if data in (b".\r\n", b".\n", b""):
+                            break
+                        lines.append(data[1:] if data.startswith(b"..") else data)
+                    message = email.message_from_bytes(b"".join(lines), policy=default_policy)
+                    self.messages.append(message)
+                    logger.info(f"Received {message['Subject']!r} for {', '.join(recipients)}")
+                    recipients = []
+                    reply("250 OK")
+                elif command == 'RSET':
+                    recipients = []
+                    reply("250 OK")
+                elif command == 'NOOP':
+                    reply("250 OK")
+                elif command == 'QUIT':
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def main(port: int):
+    server = LocalSMTPServer(port=port)
+    await server.start()
+    logger.info(f"Local SMTP server listening on {server.host}:{server.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1025))
@@ -0,0 +1,113 @@
+"""Pooled SMTP transport.
+
+Opening an SMTP session costs a TCP connect, a TLS handshake and an AUTH
+round-trip, so sessions are kept open and reused. smtplib is blocking, so
+every SMTP call runs in a worker thread and never stalls the event loop; the
+pool size bounds how many sends run at once.
+"""
+import asyncio
+import logging
+import smtplib
+import time
+from email.message import Message
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    def __init__(self, host: str, port: int, user: str = '', password: str = '',
+                 starttls: bool = True, size: int = 2, idle_timeout: float = 60, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []  # (connection, last used) pairs, most recently used last
+
+    async def send(self, msg: Message):
+        """Send msg over a pooled connection, opening one if none is idle"""
+        async with self._slots:
+            conn, error = await asyncio.to_thread(self._send, self._checkout(), msg)
+            if conn is not None:
+                self._idle.append((conn, time.monotonic()))
+            if error is not None:
+                raise error
+
+    def _checkout(self):
+        """Most recently used idle connection; stale ones are closed in the background"""
+        now = time.monotonic()
+        stale = [conn for conn, used in self._idle if now - used > self.idle_timeout]
+        self._idle = [(conn, used) for conn, used in self._idle if now - used <= self.idle_timeout]
+        for conn in stale:
+            asyncio.get_running_loop().run_in_executor(None, self._close, conn)
+        return self._idle.pop()[0] if self._idle else None
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.user:
+            conn.login(self.user, self.password)
+        return conn
+
+    def _send(self, conn, msg: Message) -> Tuple[Optional[smtplib.SMTP], Optional[Exception]]:
+        """Send on conn (or a new connection).
+
+        Returns the connection to keep, if it is still usable, and the error to
+        raise, if the send failed. A refused recipient or rejected message leaves
+        the session healthy, so only a broken connection is closed.
+        """
+        if conn is not None:
+            try:
+                conn.send_message(msg)
+                return conn, None
+            except Exception as e:
+                if not self._is_broken(e):
+                    return self._reset(conn), e
+                self._close(conn)
+                if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                    return None, e
+                # The server dropped the idle session or reset it; retry once on a fresh one
+        conn = self._connect()
+        try:
+            conn.send_message(msg)
+            return conn, None
+        except Exception as e:
+            if not self._is_broken(e):
+                return self._reset(conn), e
+            self._close(conn)
+            return None, e
+
+    @staticmethod
+    def _is_broken(error: Exception) -> bool:
+        """Whether error leaves the session unusable (smtplib errors are OSErrors too, so check them first)"""
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421  # service closing the channel
+        return not isinstance(error, smtplib.SMTPException)
+
+    def _reset(self, conn: smtplib.SMTP) -> Optional[smtplib.SMTP]:
+        """Clear the failed transaction so conn can be reused; None if the session did not survive"""
+        try:
+            conn.rset()
+            return conn
+        except Exception:
+            self._close(conn)
+            return None
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await asyncio.to_thread(self._close, conn)
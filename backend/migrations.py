@@ -0,0 +1,177 @@
+"""One-off data migrations for the InHaus backend.
+
+Each migration is idempotent and can be run from the command line:
+
+    python migrations.py seed_counters
+    python migrations.py backfill_datetimes
+    python migrations.py backfill_room_totals
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from totals import room_breakdown
+
+logger = logging.getLogger(__name__)
+
+# Document number sequences: counter prefix -> (collection, number field)
+NUMBER_SEQUENCES = {
+    "QT": ("quotations", "quote_number"),
+    "INV": ("invoices", "invoice_number"),
+}
+
+NUMBER_PATTERN = re.compile(r"^(?P<prefix>[A-Z]+)-(?P<year>\d{4})-(?P<seq>\d+)$")
+
+
+async def seed_counters(db):
+    """Seed the per-year counters from the highest numbers already issued.
+
+    Uses $max, so it never moves a counter backwards and is safe to re-run.
+    """
+    for prefix, (collection, field) in NUMBER_SEQUENCES.items():
+        highest = {}
+        cursor = db[collection].find({field: {"$regex": f"^{prefix}-"}}, {"_id": 0, field: 1})
+        async for doc in cursor:
+            match = NUMBER_PATTERN.match(doc.get(field) or "")
+            if match:
+                key = f"{prefix}-{match['year']}"
+                highest[key] = max(highest.get(key, 0), int(match['seq']))
+
+        for key, seq in highest.items():
+            await db.counters.update_one({"_id": key}, {"$max": {"seq": seq}}, upsert=True)
+            logger.info(f"Counter {key} seeded to {seq}")
+
+
+# Timestamp fields written as ISO strings before they were stored as BSON dates
+DATETIME_FIELDS = {
+    "quotations": ("created_at", "updated_at", "sent_at"),
+    "invoices": ("created_at", "updated_at", "sent_at"),
+    "products": ("created_at", "updated_at"),
+    "users": ("created_at", "last_login"),
+    "contact_submissions": ("timestamp",),
+    "status_checks": ("timestamp",),
+    "activity_logs": ("timestamp",),
+}
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def parse_datetime(value: str):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def backfill_datetimes(db, batch_size: int = BACKFILL_BATCH_SIZE):
+    """Convert ISO string timestamps to BSON dates in batches.
+
+    Only string values are selected, so an interrupted run resumes where it
+    stopped. Each update is conditional on the old string, so a document
+    rewritten by the API in the meantime is left alone.
+    """
+    for collection, fields in DATETIME_FIELDS.items():
+        for field in fields:
+            converted = skipped = 0
+            last_id = None
+            while True:
+                query = {field: {"$type": "string"}}
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                batch = await db[collection].find(query, {field: 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+                if not batch:
+                    break
+                last_id = batch[-1]["_id"]
+
+                updates = []
+                for doc in batch:
+                    parsed = parse_datetime(doc[field])
+                    if parsed is None:
+                        skipped += 1
+                        logger.warning(f"{collection}.{field}: cannot parse {doc[field]!r} on {doc['_id']}")
+                        continue
+                    updates.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: parsed}}))
+                if updates:
+                    result = await db[collection].bulk_write(updates, ordered=False)
+                    converted += result.modified_count
+
+            if converted or skipped:
+                logger.info(f"{collection}.{field}: converted {converted}, skipped {skipped}")
+
+
+# Documents whose items are grouped into a stored per-room breakdown
+ROOM_TOTAL_COLLECTIONS = ("quotations", "invoices")
+
+
+async def backfill_room_totals(db, batch_size: int = BACKFILL_BATCH_SIZE):
+    """Store the per-room breakdown on documents saved without one.
+
+    Each update is conditional on updated_at, so a document the API rewrote
+    in the meantime (and therefore already priced) is left alone.
+    """
+    query = {"$or": [
+        {"rooms": {"$exists": False}},
+        {"rooms.0": {"$exists": True}, "rooms.positions": {"$exists": False}}
+    ]}
+    for collection in ROOM_TOTAL_COLLECTIONS:
+        updated = 0
+        last_id = None
+        while True:
+            batch_query = dict(query, _id={"$gt": last_id}) if last_id is not None else query
+            batch = await db[collection].find(batch_query, {"items": 1, "updated_at": 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+
+            updates = [
+                UpdateOne(
+                    {"_id": doc["_id"], "updated_at": doc.get("updated_at")},
+                    {"$set": {"rooms": room_breakdown(doc.get("items") or [])}}
+                )
+                for doc in batch
+            ]
+            result = await db[collection].bulk_write(updates, ordered=False)
+            updated += result.modified_count
+
+        if updated:
+            logger.info(f"{collection}: stored room totals on {updated} documents")
+
+
+MIGRATIONS = {
+    "seed_counters": seed_counters,
+    "backfill_datetimes": backfill_datetimes,
+    "backfill_room_totals": backfill_room_totals,
+}
+
+
+async def main(names):
+    root_dir = Path(__file__).parent
+    load_dotenv(root_dir / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    try:
+        db = client[os.environ['DB_NAME']]
+        for name in names:
+            logger.info(f"Running migration {name}")
+            await MIGRATIONS[name](db)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    requested = sys.argv[1:]
+    unknown = [name for name in requested if name not in MIGRATIONS]
+    if not requested or unknown:
+        print(f"Usage: python migrations.py {' | '.join(MIGRATIONS)}")
+        sys.exit(1)
+    asyncio.run(main(requested))
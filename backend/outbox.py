@@ -0,0 +1,165 @@
+"""Mongo-backed outbox for outgoing email.
+
+Endpoints enqueue a job and return immediately; worker tasks claim due jobs
+one at a time and run the handler registered for the job kind. A failed job
+is retried with exponential backoff and moved to the "dead" state once it
+runs out of attempts. Claims are leased, so a job held by a worker that died
+is picked up again when the lease expires (or goes dead if that was its last
+attempt), and because claiming is a single
+find_one_and_update every API process can run workers against the same
+collection.
+
+Job states: queued -> sending -> sent, or back to queued for a retry, or dead.
+"""
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_SENDING = "sending"
+JOB_SENT = "sent"
+JOB_DEAD = "dead"
+
+
+class Outbox:
+    def __init__(self, collection, max_attempts: int = 5, backoff_base: float = 30,
+                 backoff_max: float = 3600, lease: float = 300, poll_interval: float = 5, workers: int = 1):
+        self.collection = collection
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self._handlers: Dict[str, Callable[[dict], Awaitable[None]]] = {}
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def handler(self, kind: str):
+        """Register the coroutine that delivers jobs of this kind"""
+        def register(func):
+            self._handlers[kind] = func
+            return func
+        return register
+
+    async def enqueue(self, kind: str, payload: dict, created_by: Optional[str] = None) -> dict:
+        now = datetime.now(timezone.utc)
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "payload": payload,
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None
+        }
+        await self.collection.insert_one(dict(job))
+        if self._wakeup:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": job_id}, {"_id": 0})
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds to wait before the next attempt, with up to 10% jitter"""
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(1, 1.1)
+
+    async def claim(self) -> Optional[dict]:
+        """Take the next due job, or a job whose lease expired with attempts left"""
+        now = datetime.now(timezone.utc)
+        # A handler that hangs or takes its worker down never records a failure, so an expired
+        # lease on the last attempt is where such a job goes dead
+        expired = await self.collection.update_many(
+            {"status": JOB_SENDING, "locked_until": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+            {"$set": {
+                "status": JOB_DEAD, "locked_until": None, "last_error": "Lease expired on the last attempt",
+                "updated_at": now, "completed_at": now
+            }}
+        )
+        if expired.modified_count:
+            logger.error(f"{expired.modified_count} email jobs dead after their last attempt's lease expired")
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": JOB_QUEUED, "next_attempt_at": {"$lte": now}},
+                {"status": JOB_SENDING, "locked_until": {"$lt": now}, "$expr": {"$lt": ["$attempts", "$max_attempts"]}}
+            ]},
+            {
+                "$set": {"status": JOB_SENDING, "locked_until": now + timedelta(seconds=self.lease), "updated_at": now},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def run_job(self, job: dict):
+        handler = self._handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler for job kind {job['kind']}")
+            await handler(job)
+        except Exception as e:
+            now = datetime.now(timezone.utc)
+            update = {"locked_until": None, "last_error": str(e), "updated_at": now}
+            if job["attempts"] >= job["max_attempts"]:
+                update.update(status=JOB_DEAD, completed_at=now)
+                logger.error(f"Email job {job['id']} ({job['kind']}) dead after {job['attempts']} attempts: {str(e)}")
+            else:
+                delay = self.backoff(job["attempts"])
+                update.update(status=JOB_QUEUED, next_attempt_at=now + timedelta(seconds=delay))
+                logger.warning(f"Email job {job['id']} ({job['kind']}) attempt {job['attempts']} failed, retrying in {delay:.0f}s: {str(e)}")
+            await self.collection.update_one({"id": job["id"]}, {"$set": update})
+            return
+
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"id": job["id"]},
+            {"$set": {"status": JOB_SENT, "locked_until": None, "last_error": None, "updated_at": now, "completed_at": now}}
+        )
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self.claim()
+            except Exception as e:
+                logger.error(f"Error claiming email job: {str(e)}")
+                job = None
+
+            if job:
+                try:
+                    await self.run_job(job)
+                except Exception as e:
+                    # Recording the outcome failed; the job's lease expires and it is claimed again
+                    logger.error(f"Error finishing email job {job['id']}: {str(e)}")
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,89 @@
+"""Password hashing and verification off the event loop.
+
+bcrypt is deliberately slow, and run inline in an ``async def`` handler it
+stalls every other request for the length of the hash. PasswordHasher runs
+it on a small dedicated thread pool instead; bcrypt releases the GIL, so the
+event loop keeps serving while hashes are computed. The pool is bounded,
+and so are concurrent attempts per client address and per account, so a
+login storm is turned away early instead of queueing up behind the pool.
+Stored hashes made with an older cost factor are upgraded on the next
+successful login.
+"""
+import asyncio
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+
+class TooManyAttempts(Exception):
+    """Raised when a client address or account already has its allowed attempts in flight"""
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is at its configured depth"""
+
+
+class PasswordHasher:
+    """Bounded thread pool for bcrypt hashing and verification.
+
+    Settings (constructor arguments override the environment):
+      PASSWORD_HASH_WORKERS     - threads running bcrypt (default 2)
+      PASSWORD_HASH_MAX_QUEUE   - max operations running or waiting before new ones are rejected
+      PASSWORD_MAX_PER_IP       - concurrent attempts allowed from one client address. Behind a
+                                  reverse proxy the caller must pass the real client address, e.g.
+                                  from X-Forwarded-For sent by a trusted proxy (FORWARDED_ALLOW_IPS);
+                                  keying on the proxy's own address would share one limit site-wide
+      PASSWORD_MAX_PER_ACCOUNT  - concurrent attempts allowed against one account
+      BCRYPT_ROUNDS             - cost factor for new hashes; hashes with another cost are rehashed on login
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = None, max_per_ip: int = None,
+                 max_per_account: int = None, rounds: int = None):
+        self.workers = workers or int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+        self.max_queue = max_queue or int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', self.workers * 8))
+        self.max_per_ip = max_per_ip or int(os.environ.get('PASSWORD_MAX_PER_IP', 4))
+        self.max_per_account = max_per_account or int(os.environ.get('PASSWORD_MAX_PER_ACCOUNT', 2))
+        rounds = rounds or int(os.environ.get('BCRYPT_ROUNDS', 12))
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._pending = 0
+        self._in_flight = Counter()
+
+    @contextmanager
+    def attempt(self, client_ip: str, account: str):
+        """Hold a slot for one login or registration attempt by client_ip against account"""
+        keys = (("ip", client_ip), ("account", account.lower()))
+        if self._in_flight[keys[0]] >= self.max_per_ip or self._in_flight[keys[1]] >= self.max_per_account:
+            raise TooManyAttempts(f"Too many concurrent attempts for {account} from {client_ip}")
+        self._in_flight.update(keys)
+        try:
+            yield
+        finally:
+            self._in_flight.subtract(keys)
+            for key in keys:
+                if self._in_flight[key] <= 0:
+                    del self._in_flight[key]
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Check password; on success also return a new hash if the stored one uses an outdated cost"""
+        return await self._run(self.context.verify_and_update, password, password_hash)
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_queue:
+            raise HasherBusy(f"Password hashing queue is full ({self.max_queue} jobs)")
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,90 @@
+"""Micro-benchmark for PDF rendering.
+
+Times the per-room work of a quotation render (room heading, items table and
+the room's summary row) separately from a full document build, on synthetic
+quotations so no database or uploads are needed:
+
+    python pdf_benchmark.py --rooms 20 --items 15 --repeat 50
+"""
+import argparse
+import logging
+import timeit
+from datetime import datetime, timezone
+
+from reportlab.platypus import Paragraph
+
+from pdf_generator import PDFGenerator
+from totals import quotation_totals
+
+
+def sample_quotation(rooms: int, items_per_room: int) -> dict:
+    items = [
+        {
+            "id": f"{room}-{index}",
+            "room_area": f"Room {room + 1}",
+            "model_no": f"IH-{index:03d}",
+            "product_name": f"Smart Switch {index}",
+            "description": "Touch panel with scene control, dimming and app integration",
+            "quantity": 1 + index % 4,
+            "list_price": 5200.0,
+            "discount": 0,
+            "offered_price": 4800.0,
+            "company_cost": 3100.0
+        }
+        for room in range(rooms)
+        for index in range(items_per_room)
+    ]
+    quotation = {
+        "id": "benchmark",
+        "quote_number": "QT-BENCH-0001",
+        "revision_no": 0,
+        "customer_name": "Benchmark Customer",
+        "customer_email": "benchmark@example.com",
+        "items": items,
+        "overall_discount": 0,
+        "installation_charges": 0,
+        "gst_percentage": 18,
+        "validity_days": 15,
+        "payment_terms": "50% advance, 50% before dispatch",
+        "created_at": datetime.now(timezone.utc)
+    }
+    quotation.update(quotation_totals(items, 0, 0, 18))
+    return quotation
+
+
+def build_rooms(generator: PDFGenerator, quotation: dict) -> list:
+    """The flowables generate_quotation_pdf builds for every room, without laying them out"""
+    story = []
+    room_totals = generator._room_totals(quotation)
+    for room, totals in room_totals.items():
+        items = [quotation['items'][i] for i in totals['positions']]
+        story.append(Paragraph(f"<b>Scope of Automation - </b>{room}", generator.paragraph_styles['RoomHeading']))
+        story.extend(generator._create_items_table(items, totals))
+    story.extend(generator._create_summary_table(quotation, room_totals))
+    return story
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--items', type=int, default=10, help='items per room')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    generator = PDFGenerator()
+    quotation = sample_quotation(args.rooms, args.items)
+    settings = {}
+
+    room_time = min(timeit.repeat(lambda: build_rooms(generator, quotation), number=1, repeat=args.repeat))
+    render_time = min(timeit.repeat(
+        lambda: generator.generate_quotation_pdf(quotation, settings), number=1, repeat=max(1, args.repeat // 10)
+    ))
+
+    print(f"{args.rooms} rooms x {args.items} items")
+    print(f"room flowables: {room_time * 1000:.2f} ms total, {room_time / args.rooms * 1e6:.0f} us per room")
+    print(f"full render:    {render_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
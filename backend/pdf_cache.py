@@ -0,0 +1,84 @@
+"""Content-addressed cache for rendered quotation and invoice PDFs.
+
+A cache key is the SHA-256 of the document, the company settings, the PDF
+template version and the modification times of the images the document
+draws (logo, cover and product images), so any change to what is printed,
+including a replaced image file, produces a new key. The
+files live on disk, which keeps the cache shared between uvicorn workers.
+"""
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from image_cache import mtime_ns
+from pdf_generator import TEMPLATE_VERSION, document_image_paths
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write data so readers see either the old file or the complete new one"""
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+class PDFCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def cache_key(kind: str, document: dict, settings_data: dict) -> str:
+        """Hash everything that ends up on the page; stats the referenced image files"""
+        images = {str(path): mtime_ns(path) for path in document_image_paths(kind, document)}
+        payload = json.dumps(
+            {"kind": kind, "template": TEMPLATE_VERSION, "document": document, "settings": settings_data, "images": images},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, kind: str, document_id: str, key: str) -> Path:
+        return self.cache_dir / f"{kind}_{document_id}_{key}.pdf"
+
+    def get(self, kind: str, document_id: str, key: str) -> Optional[Path]:
+        path = self.path_for(kind, document_id, key)
+        return path if path.exists() else None
+
+    def temp_path(self, kind: str, document_id: str) -> Path:
+        """Private path to render into before publishing with store()"""
+        return self.cache_dir / f".{kind}_{document_id}_{uuid.uuid4().hex}.tmp"
+
+    def store(self, kind: str, document_id: str, key: str, rendered_path: Path) -> Path:
+        """Atomically publish a rendered file and drop older entries for the same document"""
+        path = self.path_for(kind, document_id, key)
+        os.replace(rendered_path, path)
+        for stale in self.cache_dir.glob(f"{kind}_{document_id}_*.pdf"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        return path
+
+    def store_bytes(self, kind: str, document_id: str, key: str, data: bytes) -> Path:
+        """Publish a PDF rendered in memory"""
+        temp_path = self.temp_path(kind, document_id)
+        try:
+            temp_path.write_bytes(data)
+            return self.store(kind, document_id, key, temp_path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def invalidate(self, kind: str, document_id: str):
+        for path in self.cache_dir.glob(f"{kind}_{document_id}_*.pdf"):
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.pdf"):
+            path.unlink(missing_ok=True)
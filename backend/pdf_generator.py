@@ -2,12 +2,22 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak, Flowable
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from image_cache import image_cache
+from totals import room_breakdown
 from datetime import datetime, timedelta
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
+from typing import List, Optional
+import math
 import os
+import random
+import uuid
 import logging
 
 # Try to import PIL, but don't fail if it's not available
@@ -18,11 +28,194 @@ except ImportError:
     PIL_AVAILABLE = False
     logging.warning("PIL/Pillow not available, logo aspect ratio may not be preserved")
 
+# Bump whenever the rendered layout changes so cached PDFs are regenerated
+TEMPLATE_VERSION = '2'
+
+# Cover page layout: logo band on top, title band at the bottom, interior image in between
+COVER_TOP_HEIGHT = 180
+COVER_BOTTOM_HEIGHT = 280
+COVER_IMAGE_PADDING = 20
+COVER_IMAGE_DPI = 150
+
+# Items table text cells are drawn as plain table strings when they fit on one line; with the
+# same font size and leading as the Paragraph styles they land on the same baseline. A Paragraph
+# reaches it through an extra translation, so a baseline falling exactly on a half pixel can
+# round to the neighbouring pixel row when rasterized (1px at some resolutions)
+ITEM_CELL_FONT_SIZE = 10
+ITEM_CELL_LEADING = 13
+ITEM_COL_WIDTHS = [0.4*inch, 0.75*inch, 0.95*inch, 2.45*inch, 0.5*inch, 1.05*inch, 1.15*inch]
+ITEM_CELL_PADDING = 8
+
+# Managed cover image asset, bundled with the deployment or uploaded through the settings API
+COVER_IMAGE_PATH = Path(os.environ.get(
+    'COVER_IMAGE_PATH',
+    Path(__file__).parent / 'uploads' / 'cover' / 'cover_background.jpg'
+))
+
+# Brand logo used on the cover, invoice header and page watermark
+LOGO_PATH = Path('/app/frontend/public/inhaus/fulllogo_transparent_nobuffer.png')
+
+# Product images in item tables
+PRODUCT_UPLOADS_DIR = Path('/app/backend/uploads/products')
+ITEM_IMAGE_SIZE = 0.65 * inch
+
+# Name of the form XObject holding the premium page background
+PREMIUM_BACKGROUND_FORM = 'InHausPremiumBackground'
+
+
+@lru_cache(maxsize=1)
+def _premium_background_geometry():
+    """Compute the hexagon and particle layout of the premium background once per process"""
+    page_width, page_height = A4
+
+    # Hexagon honeycomb - unit offsets are shared by every cell
+    hex_size = 40
+    unit = [
+        (hex_size * 0.5 * math.cos(math.radians(60 * i)), hex_size * 0.5 * math.sin(math.radians(60 * i)))
+        for i in range(6)
+    ]
+    hexagons = []
+    for row in range(-2, int(page_height / hex_size) + 2):
+        for col in range(-2, int(page_width / hex_size) + 2):
+            x = col * hex_size * 1.5
+            y = row * hex_size * 0.866  # sqrt(3)/2
+            if col % 2:
+                y += hex_size * 0.433
+            hexagons.append(tuple((x + dx, y + dy) for dx, dy in unit))
+
+    # Particles - private seeded generator keeps the pattern stable without touching global random state
+    rng = random.Random(42)
+    particles = []
+    for _ in range(80):
+        x = rng.uniform(40, page_width - 40)
+        y = rng.uniform(40, page_height - 40)
+        size = rng.uniform(1, 3)
+        particles.append((x, y, size, rng.random() > 0.5))
+
+    return {'hexagons': tuple(hexagons), 'particles': tuple(particles)}
+
+
+class CachedImageFlowable(Flowable):
+    """Image flowable drawn from a decoded ImageReader held by the image cache.
+
+    platypus.Image only accepts a file name or file object and decodes it
+    again, so this draws the cached reader with canvas.drawImage instead.
+    Every flowable for the same cached image draws the same reader, so the
+    canvas registers the picture as a single XObject per document.
+    """
+    def __init__(self, cached, width, height, hAlign='CENTER'):
+        super().__init__()
+        self.reader = cached.reader
+        self.drawWidth = width
+        self.drawHeight = height
+        self.hAlign = hAlign
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.drawWidth, self.drawHeight, mask='auto')
+
+
+def resolve_upload_path(image_url: str) -> Optional[Path]:
+    """Convert an uploaded product image URL to its file system path, or None if it leads outside the uploads"""
+    if image_url.startswith('/uploads/products/') or image_url.startswith('/api/uploads/products/'):
+        # Thumbnails live in a subdirectory, so keep the relative path but refuse anything like "../"
+        path = (PRODUCT_UPLOADS_DIR / image_url.split('/products/', 1)[1]).resolve()
+        return path if path.is_relative_to(PRODUCT_UPLOADS_DIR.resolve()) else None
+    # If full path is provided
+    return Path(image_url)
+
+
+def document_image_paths(kind: str, document: dict) -> List[Path]:
+    """Every image file a quotation or invoice render may draw"""
+    paths = [LOGO_PATH, COVER_IMAGE_PATH] if kind == "quotation" else [LOGO_PATH]
+    for item in document.get('items', []):
+        for image_url in (item.get('thumbnail_url'), item.get('image_url')):
+            path = image_url and resolve_upload_path(image_url)
+            if path:
+                paths.append(path)
+    return paths
+
+
+def _fit_to_cell(img_width, img_height, cell_size):
+    """Scale an image to the cell width, limiting the height to keep rows consistent"""
+    aspect_ratio = img_height / img_width
+    width = cell_size
+    height = width * aspect_ratio
+    if height > cell_size:
+        height = cell_size
+        width = height / aspect_ratio
+    return width, height
+
+
+def cover_image_box():
+    """(x, y, width, height) in points of the interior image area on the cover page"""
+    page_width, page_height = A4
+    middle_height = page_height - COVER_TOP_HEIGHT - COVER_BOTTOM_HEIGHT
+    return (
+        COVER_IMAGE_PADDING,
+        COVER_BOTTOM_HEIGHT + COVER_IMAGE_PADDING,
+        page_width - 2 * COVER_IMAGE_PADDING,
+        middle_height - 2 * COVER_IMAGE_PADDING
+    )
+
+
+def prepare_cover_image(source, output_path: Path = COVER_IMAGE_PATH) -> Path:
+    """Downscale a cover image once to the exact pixel size of the cover image box.
+
+    source is a path or raw image bytes. The result is written atomically as a
+    JPEG so running renderers never read a partial file.
+    """
+    from PIL import ImageOps
+    
+    _, _, width, height = cover_image_box()
+    box_px = (round(width / inch * COVER_IMAGE_DPI), round(height / inch * COVER_IMAGE_DPI))
+    
+    img = PILImage.open(BytesIO(source) if isinstance(source, bytes) else source)
+    img = ImageOps.exif_transpose(img).convert('RGB')
+    # Fit inside the box like drawImage(preserveAspectRatio=True) does, never upscale
+    if img.width > box_px[0] or img.height > box_px[1]:
+        img = ImageOps.contain(img, box_px, PILImage.LANCZOS)
+    
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # A private temp name per call, so concurrent uploads never write into each other's file
+    temp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        img.save(temp_path, 'JPEG', quality=90, optimize=True)
+        os.replace(temp_path, output_path)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return output_path
+
+
+def _form_resources(canvas):
+    """Build the resource dictionary for the form currently being drawn on canvas.
+
+    ReportLab's PDFFormXObject only emits fonts and XObjects, so transparency
+    (ExtGState) used inside the form would otherwise be lost.
+    """
+    resources = pdfdoc.PDFResourceDictionary()
+    resources.basicFonts()
+    resources.allProcs()
+    if canvas._formsinuse:
+        resources.XObject = canvas._doc.xobjDict(canvas._formsinuse)
+    ext_gstate = canvas._extgstate.getState()
+    if ext_gstate:
+        resources.ExtGState = ext_gstate
+    return resources
+
 class PDFGenerator:
-    def __init__(self):
+    def __init__(self, cover_image_path: Path = None):
         self.styles = getSampleStyleSheet()
         self.page_width, self.page_height = A4
         
+        # Cover page interior image, decoded once by the image cache and reused by every cover page
+        self.cover_image_path = Path(cover_image_path or COVER_IMAGE_PATH)
+        self._cover_image_missing = False
+        
         # Professional Blue-Grey Color Palette - Consistent Design
         self.primary_color = colors.HexColor('#D3DDF0')  # Light blue-grey (header)
         self.primary_dark = colors.black  # Pure black for borders
@@ -106,13 +299,393 @@ class PDFGenerator:
             textColor=self.secondary_color,
             fontName='Helvetica-Bold'
         )
+        
+        # Remaining paragraph and table styles are built once here and shared by every render
+        self.paragraph_styles = self._build_paragraph_styles()
+        self.table_styles = self._build_table_styles()
+    
+    def _build_paragraph_styles(self) -> dict:
+        """Every paragraph style used by the page builders, keyed by style name"""
+        styles = [
+            ParagraphStyle(
+                'CoverTitle',
+                parent=self.styles['Heading1'],
+                fontSize=38,
+                textColor=colors.HexColor('#1A1A1A'),
+                alignment=TA_CENTER,
+                fontName='Helvetica-Bold',
+                leading=46,
+                spaceBefore=0,
+                spaceAfter=8
+            ),
+            ParagraphStyle(
+                'CoverTagline',
+                parent=self.styles['Normal'],
+                fontSize=11,
+                textColor=colors.HexColor('#000000'),  # Black color
+                alignment=TA_CENTER,
+                fontName='Helvetica',
+                leading=14,
+                leftIndent=50,
+                rightIndent=50
+            ),
+            ParagraphStyle(
+                'PreparedFor',
+                parent=self.styles['Normal'],
+                fontSize=14,
+                textColor=colors.HexColor('#1A1A1A'),
+                fontName='Helvetica-Bold',
+                alignment=TA_LEFT,
+                spaceBefore=5,
+                spaceAfter=15
+            ),
+            ParagraphStyle(
+                'CustomerDetail',
+                parent=self.styles['Normal'],
+                fontSize=11,
+                textColor=colors.HexColor('#333333'),
+                alignment=TA_LEFT,
+                leading=16
+            ),
+            ParagraphStyle(
+                'ThankYouHeading',
+                parent=self.styles['Heading1'],
+                fontSize=32,
+                textColor=colors.HexColor('#1A1A1A'),
+                alignment=TA_CENTER,
+                fontName='Helvetica-Bold',
+                leading=38,
+                spaceAfter=30
+            ),
+            ParagraphStyle(
+                'ThankYouMessage',
+                parent=self.styles['Normal'],
+                fontSize=12,
+                textColor=colors.HexColor('#333333'),
+                alignment=TA_CENTER,
+                fontName='Helvetica',
+                leading=18,
+                leftIndent=80,
+                rightIndent=80
+            ),
+            ParagraphStyle(
+                'Signature',
+                parent=self.styles['Normal'],
+                fontSize=11,
+                textColor=colors.HexColor('#333333'),
+                alignment=TA_CENTER,
+                fontName='Helvetica',
+                leading=16
+            ),
+            ParagraphStyle(
+                'CompanyInfo',
+                parent=self.styles['Normal'],
+                fontSize=11,
+                textColor=colors.HexColor('#333333'),
+                alignment=TA_CENTER,
+                fontName='Helvetica',
+                leading=16
+            ),
+            ParagraphStyle(
+                'SummaryHeading',
+                parent=self.styles['Heading1'],
+                fontSize=18,
+                textColor=colors.HexColor('#1A1A1A'),  # Very dark, almost black
+                fontName='Helvetica-Bold',
+                alignment=TA_LEFT,
+                spaceBefore=10,
+                spaceAfter=20,
+                leading=22
+            ),
+            ParagraphStyle(
+                'TableHeader',
+                parent=self.styles['Normal'],
+                fontSize=9,  # Reduced to fit in single line
+                textColor=self.header_text,
+                fontName='Helvetica-Bold',
+                alignment=TA_CENTER,
+                leading=11,
+                spaceBefore=0,
+                spaceAfter=0
+            ),
+            ParagraphStyle(
+                'Content',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=self.text_color,
+                alignment=TA_LEFT,
+                leading=13,
+                spaceBefore=2,
+                spaceAfter=2
+            ),
+            ParagraphStyle(
+                'CenterContent',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=self.text_color,
+                alignment=TA_CENTER,
+                leading=13,
+                fontName='Helvetica'
+            ),
+            ParagraphStyle(
+                'RightContent',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=self.text_color,
+                alignment=TA_RIGHT,
+                leading=13,
+                fontName='Helvetica'
+            ),
+            ParagraphStyle(
+                'TotalLabel',
+                parent=self.styles['Normal'],
+                fontSize=11,
+                textColor=self.total_text,
+                fontName='Helvetica-Bold',
+                alignment=TA_RIGHT
+            ),
+            ParagraphStyle(
+                'TotalAmount',
+                parent=self.styles['Normal'],
+                fontSize=12,
+                textColor=self.total_text,
+                fontName='Helvetica-Bold',
+                alignment=TA_RIGHT
+            ),
+            ParagraphStyle(
+                'SummaryHeader',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=colors.HexColor('#333333'),
+                fontName='Helvetica-Bold',
+                alignment=TA_CENTER,
+                leading=13
+            ),
+            ParagraphStyle(
+                'SummaryNumber',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=colors.HexColor('#333333'),
+                alignment=TA_CENTER,
+                leading=13
+            ),
+            ParagraphStyle(
+                'SummaryRoom',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=colors.HexColor('#333333'),
+                alignment=TA_LEFT,
+                leading=13
+            ),
+            ParagraphStyle(
+                'SummaryAmount',
+                parent=self.styles['Normal'],
+                fontSize=10,
+                textColor=colors.HexColor('#333333'),
+                fontName='Helvetica-Bold',
+                alignment=TA_RIGHT,
+                leading=13
+            ),
+            ParagraphStyle(
+                'RoomHeading',
+                parent=self.heading_style,
+                fontSize=14,
+                textColor=self.secondary_color,
+                spaceBefore=8,
+                spaceAfter=10,
+                leftIndent=0,
+                borderColor=self.primary_color,
+                borderWidth=0,
+                borderPadding=0,
+                keepWithNext=True  # Keep heading with table
+            )
+        ]
+        return {style.name: style for style in styles}
+    
+    def _build_table_styles(self) -> dict:
+        """Table styles for every fixed-layout table, keyed by table"""
+        return {
+            # Quotation details grid
+            'quotation_details': TableStyle([
+                # Light grey background for labels (columns 0 and 2)
+                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F5F5F5')),
+                ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#F5F5F5')),
+                
+                # White background for values (columns 1 and 3)
+                ('BACKGROUND', (1, 0), (1, -1), colors.white),
+                ('BACKGROUND', (3, 0), (3, -1), colors.white),
+                
+                # Light grey borders
+                ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
+                ('INNERGRID', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
+                
+                # Left alignment for all cells
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                
+                # Padding
+                ('LEFTPADDING', (0, 0), (-1, -1), 10),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+                ('TOPPADDING', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+                
+                # Font
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10)
+            ]),
+            # Quote and invoice info grids
+            'document_info': TableStyle([
+                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+                ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f3f4f6')),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('LEFTPADDING', (0, 0), (-1, -1), 5),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+                ('TOPPADDING', (0, 0), (-1, -1), 5),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 5)
+            ]),
+            # Room items table: header, rows and room total; row backgrounds are added per table
+            'items': TableStyle([
+                # ========== HEADER - Consistent Light Blue-Grey ==========
+                ('BACKGROUND', (0, 0), (-1, 0), self.header_bg),  # Light blue-grey #D3DDF0
+                ('TEXTCOLOR', (0, 0), (-1, 0), self.header_text),  # Dark grey text
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('TOPPADDING', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+                
+                # ========== BOLD BLACK BORDERS ==========
+                ('BOX', (0, 0), (-1, -1), 2, colors.black),  # 2px BLACK outer border
+                ('LINEBELOW', (0, 0), (-1, 0), 2, colors.black),  # 2px BLACK line under header
+                ('INNERGRID', (0, 0), (-1, -1), 1.5, colors.black),  # 1.5px BLACK grid
+                
+                # ========== ALIGNMENT - Professional Layout ==========
+                ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # S.No centered
+                ('ALIGN', (1, 1), (1, -1), 'CENTER'),  # Image centered
+                ('ALIGN', (2, 1), (2, -1), 'CENTER'),  # Model No centered
+                ('ALIGN', (3, 1), (3, -1), 'LEFT'),    # Product Details left
+                ('ALIGN', (4, 1), (4, -1), 'RIGHT'),   # Qty right
+                ('ALIGN', (5, 1), (5, -1), 'RIGHT'),   # Price right
+                ('ALIGN', (6, 1), (6, -1), 'RIGHT'),   # Amount right
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                
+                # ========== ITEM TEXT - plain string cells ==========
+                ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+                ('FONTNAME', (6, 1), (6, -2), 'Helvetica-Bold'),  # Amount bold
+                ('FONTSIZE', (0, 1), (-1, -2), ITEM_CELL_FONT_SIZE),
+                ('LEADING', (0, 1), (-1, -2), ITEM_CELL_LEADING),
+                ('TEXTCOLOR', (0, 1), (-1, -2), colors.HexColor('#333333')),
+                
+                # ========== PADDING - Clean Spacing ==========
+                ('LEFTPADDING', (0, 0), (-1, -1), ITEM_CELL_PADDING),
+                ('RIGHTPADDING', (0, 0), (-1, -1), ITEM_CELL_PADDING),
+                ('TOPPADDING', (0, 1), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 1), (-1, -1), 10),
+                
+                # ========== TOTAL ROW - Same Light Blue-Grey ==========
+                ('BACKGROUND', (0, -1), (-1, -1), self.total_bg),  # Same light blue-grey #D3DDF0
+                ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),  # 2px BLACK line
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, -1), (-1, -1), 10),
+                ('TOPPADDING', (0, -1), (-1, -1), 12),
+                ('BOTTOMPADDING', (0, -1), (-1, -1), 12)
+            ]),
+            # Quotation summary with room totals and grand total
+            'summary': TableStyle([
+                # Header styling - BLUE background
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3DDF0')),  # Light blue
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#333333')),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('TOPPADDING', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                
+                # Data rows - pure white with consistent color
+                ('BACKGROUND', (0, 1), (-1, -2), colors.white),
+                ('TEXTCOLOR', (0, 1), (-1, -2), colors.HexColor('#333333')),
+                
+                # Grand total styling - BLUE background (same as header)
+                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D3DDF0')),  # Light blue
+                ('TEXTCOLOR', (0, -1), (-1, -1), colors.HexColor('#333333')),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, -1), (-1, -1), 11),
+                ('TOPPADDING', (0, -1), (-1, -1), 14),
+                ('BOTTOMPADDING', (0, -1), (-1, -1), 14),
+                ('LINEABOVE', (0, -1), (-1, -1), 2.5, colors.black),  # Thicker for emphasis
+                
+                # BOLD BLACK BORDERS - MORE PROMINENT
+                ('BOX', (0, 0), (-1, -1), 2.5, colors.black),  # Thicker outer border
+                ('LINEBELOW', (0, 0), (-1, 0), 2.5, colors.black),  # Thicker under header
+                ('INNERGRID', (0, 0), (-1, -1), 2, colors.black),  # Thicker grid
+                
+                # Alignment - all centered
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                
+                # Padding
+                ('LEFTPADDING', (0, 1), (-1, -1), 12),
+                ('RIGHTPADDING', (0, 1), (-1, -1), 12),
+                ('TOPPADDING', (0, 1), (-1, -2), 10),
+                ('BOTTOMPADDING', (0, 1), (-1, -2), 10),
+                
+                # NO alternating colors - all room rows have pure white background (transparent)
+                # This ensures Hall, Bed room, kitchen all look the same
+            ]),
+            # Invoice summary
+            'invoice_summary': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f97316')),
+                ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+            ]),
+            # Invoice payment information
+            'payment': TableStyle([
+                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+            ]),
+        }
     
     def _add_premium_background(self, canvas, doc):
-        """Add sophisticated premium background with modern UI/UX design"""
+        """Stamp the premium background onto the current page.
+
+        The background is drawn once per document into a form XObject and every
+        later page only references it, so the vector data is not repeated in
+        each page's content stream.
+        """
+        if not canvas.hasForm(PREMIUM_BACKGROUND_FORM):
+            canvas.beginForm(PREMIUM_BACKGROUND_FORM)
+            self._draw_premium_background(canvas)
+            canvas.endForm(Resources=_form_resources(canvas))
+
         canvas.saveState()
-        
+        canvas.doForm(PREMIUM_BACKGROUND_FORM)
+        canvas.restoreState()
+
+    def _draw_premium_background(self, canvas):
+        """Draw sophisticated premium background with modern UI/UX design"""
+        canvas.saveState()
+
         page_width, page_height = A4
-        
+        geometry = _premium_background_geometry()
+
         # ========== LAYER 1: PREMIUM GRADIENT OVERLAY ==========
         # Sophisticated multi-color gradient (blue to soft gold)
         canvas.setFillAlpha(0.02)  # Slightly more visible
@@ -136,27 +709,13 @@ class PDFGenerator:
         canvas.setLineWidth(1)
         
         # Create hexagon honeycomb pattern
-        hex_size = 40
-        for row in range(-2, int(page_height / hex_size) + 2):
-            for col in range(-2, int(page_width / hex_size) + 2):
-                x = col * hex_size * 1.5
-                y = row * hex_size * 0.866  # sqrt(3)/2
-                if col % 2:
-                    y += hex_size * 0.433
-                
-                # Draw hexagon
-                path = canvas.beginPath()
-                for i in range(6):
-                    angle = 60 * i
-                    import math
-                    px = x + hex_size * 0.5 * math.cos(math.radians(angle))
-                    py = y + hex_size * 0.5 * math.sin(math.radians(angle))
-                    if i == 0:
-                        path.moveTo(px, py)
-                    else:
-                        path.lineTo(px, py)
-                path.close()
-                canvas.drawPath(path, fill=0, stroke=1)
+        for vertices in geometry['hexagons']:
+            path = canvas.beginPath()
+            path.moveTo(*vertices[0])
+            for px, py in vertices[1:]:
+                path.lineTo(px, py)
+            path.close()
+            canvas.drawPath(path, fill=0, stroke=1)
         
         # ========== LAYER 3: FLOWING CONNECTION LINES (Data Flow) ==========
         canvas.setStrokeAlpha(0.03)
@@ -174,16 +733,10 @@ class PDFGenerator:
         
         # ========== LAYER 4: PARTICLE EFFECT (IoT Network Nodes) ==========
         canvas.setFillAlpha(0.04)
-        import random
-        random.seed(42)  # Consistent pattern
-        
-        for _ in range(80):
-            x = random.uniform(40, page_width - 40)
-            y = random.uniform(40, page_height - 40)
-            size = random.uniform(1, 3)
-            
+
+        for x, y, size, is_blue in geometry['particles']:
             # Vary colors - blues and greys
-            if random.random() > 0.5:
+            if is_blue:
                 canvas.setFillColorRGB(0.2, 0.4, 0.8)  # Blue
             else:
                 canvas.setFillColorRGB(0.4, 0.4, 0.5)  # Grey
@@ -268,8 +821,8 @@ class PDFGenerator:
         canvas.circle(speak_x, speak_y - 3, 4, fill=0, stroke=1)
         
         # ========== LAYER 7: CENTER LOGO WATERMARK ==========
-        logo_path = Path('/app/frontend/public/inhaus/fulllogo_transparent_nobuffer.png')
-        if logo_path.exists():
+        logo = image_cache.get(LOGO_PATH) if PIL_AVAILABLE else None
+        if logo is not None:
             try:
                 canvas.setFillAlpha(0.06)
                 canvas.setStrokeAlpha(0.06)
@@ -281,7 +834,7 @@ class PDFGenerator:
                 y = (page_height - watermark_height) / 2
                 
                 canvas.drawImage(
-                    str(logo_path),
+                    logo.reader,
                     x, y,
                     width=watermark_width,
                     height=watermark_height,
@@ -311,6 +864,22 @@ class PDFGenerator:
         
         canvas.restoreState()
     
+    def _get_cover_image(self):
+        """Return the preloaded cover ImageReader, reloading only when the asset file changes"""
+        try:
+            cached = image_cache.get(self.cover_image_path)
+        except Exception as e:
+            logging.error(f"Failed to load cover background image: {str(e)}")
+            return None
+        
+        if cached is None:
+            if not self._cover_image_missing:
+                logging.warning(f"Cover image not found at {self.cover_image_path}, cover page rendered without it")
+                self._cover_image_missing = True
+            return None
+        self._cover_image_missing = False
+        return cached.reader
+    
     def _add_cover_page_background(self, canvas, doc):
         """Add light background cover page with three sections"""
         canvas.saveState()
@@ -325,36 +894,36 @@ class PDFGenerator:
         canvas.rect(0, 0, page_width, page_height, fill=1, stroke=0)
         
         # Add interior image in middle section
-        bg_image_url = 'https://images.unsplash.com/photo-1705321963943-de94bb3f0dd3'
-        bg_image_path = Path('/tmp/cover_background.jpg')
-        
-        try:
-            # Download image if not already cached
-            if not bg_image_path.exists():
-                import urllib.request
-                urllib.request.urlretrieve(bg_image_url, str(bg_image_path))
-            
-            # Calculate dimensions for three sections
-            top_height = 180  # Top section for logo
-            bottom_height = 280  # Bottom section for QUOTATION + text (increased for more space)
-            middle_height = page_height - top_height - bottom_height  # Middle for image
-            
-            # Draw the interior image in middle section with slight padding
-            image_padding = 20  # Small padding around image
-            canvas.drawImage(
-                str(bg_image_path),
-                image_padding, bottom_height + image_padding,
-                width=page_width - (2 * image_padding),
-                height=middle_height - (2 * image_padding),
-                preserveAspectRatio=True,
-                anchor='c'
-            )
-            
-        except Exception as e:
-            logging.error(f"Failed to load cover background image: {str(e)}")
+        cover_image = self._get_cover_image()
+        if cover_image is not None:
+            try:
+                x, y, width, height = cover_image_box()
+                canvas.drawImage(
+                    cover_image,
+                    x, y,
+                    width=width,
+                    height=height,
+                    preserveAspectRatio=True,
+                    anchor='c'
+                )
+            except Exception as e:
+                logging.error(f"Failed to draw cover background image: {str(e)}")
         
         canvas.restoreState()
     
+    def _create_logo(self, width: float, fallback_height: float):
+        """Create a centered logo flowable of the given width, or None if the logo is missing"""
+        if PIL_AVAILABLE:
+            cached = image_cache.get(LOGO_PATH)
+            if cached is None:
+                return None
+            return CachedImageFlowable(cached, width, width * cached.height / cached.width)
+        
+        # Fallback if PIL is not available - use fixed dimensions
+        if not LOGO_PATH.exists():
+            return None
+        return Image(str(LOGO_PATH), width=width, height=fallback_height)
+    
     def _create_cover_page(self, quotation_data: dict, settings_data: dict):
         """Create branded cover page: light background with three sections"""
         elements = []
@@ -362,25 +931,13 @@ class PDFGenerator:
         # ========== TOP SECTION: Logo on light background ==========
         elements.append(Spacer(1, 45))
         
-        # Use the original logo with 2 inch width
-        logo_path = Path('/app/frontend/public/inhaus/fulllogo_transparent_nobuffer.png')
-        
-        if logo_path.exists():
-            try:
-                if PIL_AVAILABLE:
-                    pil_img = PILImage.open(str(logo_path))
-                    img_width, img_height = pil_img.size
-                    aspect_ratio = img_height / img_width
-                    desired_width = 1.5 * inch  # 1.5 inches as requested
-                    calculated_height = desired_width * aspect_ratio
-                    logo = Image(str(logo_path), width=desired_width, height=calculated_height)
-                else:
-                    logo = Image(str(logo_path), width=1.5*inch, height=0.52*inch)
-                
-                logo.hAlign = 'CENTER'
+        # Use the original logo with 1.5 inch width
+        try:
+            logo = self._create_logo(1.5 * inch, fallback_height=0.52 * inch)
+            if logo:
                 elements.append(logo)
-            except Exception as e:
-                logging.error(f"Failed to load logo on cover: {str(e)}")
+        except Exception as e:
+            logging.error(f"Failed to load logo on cover: {str(e)}")
         
         # Spacer after logo to separate from image
         elements.append(Spacer(1, 45))
@@ -395,33 +952,13 @@ class PDFGenerator:
         # ========== BOTTOM SECTION: QUOTATION + taglines + company info ==========
         
         # QUOTATION heading with dark color
-        title_style = ParagraphStyle(
-            'CoverTitle',
-            parent=self.styles['Heading1'],
-            fontSize=38,
-            textColor=colors.HexColor('#1A1A1A'),
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold',
-            leading=46,
-            spaceBefore=0,
-            spaceAfter=8
-        )
+        title_style = self.paragraph_styles['CoverTitle']
         
         elements.append(Paragraph("QUOTATION", title_style))
         elements.append(Spacer(1, 8))
         
         # Company taglines with black color
-        tagline_style = ParagraphStyle(
-            'CoverTagline',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=colors.HexColor('#000000'),  # Black color
-            alignment=TA_CENTER,
-            fontName='Helvetica',
-            leading=14,
-            leftIndent=50,
-            rightIndent=50
-        )
+        tagline_style = self.paragraph_styles['CoverTagline']
         
         branding_quotes = [
             "<b><i>Transform Your Space with Smart Automation</i></b>",
@@ -442,28 +979,12 @@ class PDFGenerator:
         elements.append(Spacer(1, 30))
         
         # Prepared For section
-        prepared_for_style = ParagraphStyle(
-            'PreparedFor',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.HexColor('#1A1A1A'),
-            fontName='Helvetica-Bold',
-            alignment=TA_LEFT,
-            spaceBefore=5,
-            spaceAfter=15
-        )
+        prepared_for_style = self.paragraph_styles['PreparedFor']
         
         elements.append(Paragraph("<b>PREPARED FOR:</b>", prepared_for_style))
         
         # Customer details
-        customer_style = ParagraphStyle(
-            'CustomerDetail',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_LEFT,
-            leading=16
-        )
+        customer_style = self.paragraph_styles['CustomerDetail']
         
         customer_info = f"<b>Name:</b> {quotation_data['customer_name']}<br/>"
         customer_info += f"<b>Email:</b> {quotation_data['customer_email']}"
@@ -486,32 +1007,13 @@ class PDFGenerator:
         elements.append(Spacer(1, 150))
         
         # Thank you heading
-        thank_you_style = ParagraphStyle(
-            'ThankYouHeading',
-            parent=self.styles['Heading1'],
-            fontSize=32,
-            textColor=colors.HexColor('#1A1A1A'),
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold',
-            leading=38,
-            spaceAfter=30
-        )
+        thank_you_style = self.paragraph_styles['ThankYouHeading']
         
         elements.append(Paragraph("Thank You for Choosing InHaus", thank_you_style))
         elements.append(Spacer(1, 30))
         
         # Thank you message
-        message_style = ParagraphStyle(
-            'ThankYouMessage',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_CENTER,
-            fontName='Helvetica',
-            leading=18,
-            leftIndent=80,
-            rightIndent=80
-        )
+        message_style = self.paragraph_styles['ThankYouMessage']
         
         thank_you_message = """
         We appreciate the opportunity to provide you with this quotation for transforming your space 
@@ -532,15 +1034,7 @@ class PDFGenerator:
         elements.append(Spacer(1, 60))
         
         # Closing signature
-        signature_style = ParagraphStyle(
-            'Signature',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_CENTER,
-            fontName='Helvetica',
-            leading=16
-        )
+        signature_style = self.paragraph_styles['Signature']
         
         elements.append(Paragraph(
             f"<b>Warm Regards,</b><br/>"
@@ -551,15 +1045,7 @@ class PDFGenerator:
         elements.append(Spacer(1, 40))
         
         # Company information at the end
-        company_info_style = ParagraphStyle(
-            'CompanyInfo',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_CENTER,
-            fontName='Helvetica',
-            leading=16
-        )
+        company_info_style = self.paragraph_styles['CompanyInfo']
         
         elements.append(Paragraph(
             f"<b>{settings_data.get('company_name', 'InHaus Smart Automation')}</b><br/>"
@@ -571,10 +1057,14 @@ class PDFGenerator:
         
         return elements
     
-    def generate_quotation_pdf(self, quotation_data: dict, settings_data: dict, output_path: str):
-        """Generate a professional quotation PDF with multi-page structure"""
+    def generate_quotation_pdf(self, quotation_data: dict, settings_data: dict, output_path: Optional[str] = None):
+        """Generate a professional quotation PDF with multi-page structure.
+
+        Writes to output_path, or renders in memory and returns the PDF bytes when it is None.
+        """
+        buffer = None if output_path else BytesIO()
         doc = SimpleDocTemplate(
-            output_path,
+            output_path or buffer,
             pagesize=A4,
             rightMargin=30,
             leftMargin=30,
@@ -591,57 +1081,29 @@ class PDFGenerator:
         # ========== PAGE 2+: CUSTOMER DETAILS, QUOTE INFO, PRODUCTS, SUMMARY ==========
         story.extend(self._create_customer_quote_page(quotation_data))
         story.append(Spacer(1, 30))
+        room_totals = self._room_totals(quotation_data)
         
         # Products start on same page or flow to next page naturally
         
-        # Group items by room/area
-        items_by_room = {}
-        for item in quotation_data['items']:
-            room = item['room_area']
-            if room not in items_by_room:
-                items_by_room[room] = []
-            items_by_room[room].append(item)
-        
-        # Create table for each room with enhanced section heading
-        for room, items in items_by_room.items():
+        # Create table for each room with enhanced section heading, picking its items by stored position
+        for room, totals in room_totals.items():
+            items = [quotation_data['items'][i] for i in totals['positions']]
             # Room heading with orange-highlighted area name
             room_heading = Paragraph(
                 f'<font size=14 color="#000000"><b>Scope of Automation - </b></font><font size=14 color="#FF6B35"><b>{room}</b></font>',
-                ParagraphStyle(
-                    'RoomHeading',
-                    parent=self.heading_style,
-                    fontSize=14,
-                    textColor=self.secondary_color,
-                    spaceBefore=8,
-                    spaceAfter=10,
-                    leftIndent=0,
-                    borderColor=self.primary_color,
-                    borderWidth=0,
-                    borderPadding=0,
-                    keepWithNext=True  # Keep heading with table
-                )
+                self.paragraph_styles['RoomHeading']
             )
             story.append(room_heading)
-            story.extend(self._create_items_table(items))
+            story.extend(self._create_items_table(items, totals))
             story.append(Spacer(1, 18))
         
         # Summary - NO PAGE BREAK, continue flowing
         story.append(Spacer(1, 30))
         
-        summary_heading_style = ParagraphStyle(
-            'SummaryHeading',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1A1A1A'),  # Very dark, almost black
-            fontName='Helvetica-Bold',
-            alignment=TA_LEFT,
-            spaceBefore=10,
-            spaceAfter=20,
-            leading=22
-        )
+        summary_heading_style = self.paragraph_styles['SummaryHeading']
         
         story.append(Paragraph("<b>SUMMARY</b>", summary_heading_style))
-        story.extend(self._create_summary_table(quotation_data, items_by_room))
+        story.extend(self._create_summary_table(quotation_data, room_totals))
         story.append(Spacer(1, 20))
         
         # Terms and conditions
@@ -669,12 +1131,16 @@ class PDFGenerator:
                 self._add_premium_background(canvas, doc)
         
         doc.build(story, onFirstPage=add_page_backgrounds, onLaterPages=add_page_backgrounds)
-        return output_path
+        return output_path or buffer.getvalue()
     
-    def generate_invoice_pdf(self, invoice_data: dict, settings_data: dict, output_path: str):
-        """Generate a professional invoice PDF"""
+    def generate_invoice_pdf(self, invoice_data: dict, settings_data: dict, output_path: Optional[str] = None):
+        """Generate a professional invoice PDF.
+
+        Writes to output_path, or renders in memory and returns the PDF bytes when it is None.
+        """
+        buffer = None if output_path else BytesIO()
         doc = SimpleDocTemplate(
-            output_path,
+            output_path or buffer,
             pagesize=A4,
             rightMargin=30,
             leftMargin=30,
@@ -695,25 +1161,19 @@ class PDFGenerator:
         # Invoice details and customer info
         story.extend(self._create_invoice_info(invoice_data, settings_data))
         story.append(Spacer(1, 20))
-        
-        # Group items by room/area
-        items_by_room = {}
-        for item in invoice_data['items']:
-            room = item['room_area']
-            if room not in items_by_room:
-                items_by_room[room] = []
-            items_by_room[room].append(item)
+        room_totals = self._room_totals(invoice_data)
         
         # Create table for each room
-        for room, items in items_by_room.items():
+        for room, totals in room_totals.items():
+            items = [invoice_data['items'][i] for i in totals['positions']]
             story.append(Paragraph(f"{room}", self.heading_style))
-            story.extend(self._create_items_table(items))
+            story.extend(self._create_items_table(items, totals))
             story.append(Spacer(1, 15))
         
         # Summary
         story.append(PageBreak())
         story.append(Paragraph("INVOICE SUMMARY", self.heading_style))
-        story.extend(self._create_invoice_summary_table(invoice_data, items_by_room))
+        story.extend(self._create_invoice_summary_table(invoice_data, room_totals))
         story.append(Spacer(1, 20))
         
         # Payment information
@@ -725,15 +1185,7 @@ class PDFGenerator:
             ['Due Date:', invoice_data.get('due_date', 'N/A')]
         ]
         payment_table = Table(payment_info, colWidths=[3*inch, 3*inch])
-        payment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
+        payment_table.setStyle(self.table_styles['payment'])
         story.append(payment_table)
         story.append(Spacer(1, 20))
         
@@ -742,7 +1194,7 @@ class PDFGenerator:
         
         # Build PDF with premium background on each page
         doc.build(story, onFirstPage=self._add_premium_background, onLaterPages=self._add_premium_background)
-        return output_path
+        return output_path or buffer.getvalue()
     
     def _create_header(self, settings_data: dict):
         """Create premium header with logo and company info"""
@@ -752,32 +1204,14 @@ class PDFGenerator:
         elements.append(Spacer(1, 15))
         
         # Try to add logo with proper aspect ratio preservation
-        logo_path = Path('/app/frontend/public/inhaus/fulllogo_transparent_nobuffer.png')
-        if logo_path.exists():
-            try:
-                # Use PIL if available for proper aspect ratio
-                if PIL_AVAILABLE:
-                    # Load image and get actual dimensions to preserve aspect ratio
-                    pil_img = PILImage.open(str(logo_path))
-                    img_width, img_height = pil_img.size
-                    aspect_ratio = img_height / img_width
-                    
-                    # Set width and calculate proportional height
-                    desired_width = 2.8 * inch
-                    calculated_height = desired_width * aspect_ratio
-                    
-                    logo = Image(str(logo_path), width=desired_width, height=calculated_height)
-                else:
-                    # Fallback if PIL is not available - use fixed dimensions
-                    logo = Image(str(logo_path), width=2.8*inch, height=0.9*inch)
-                
-                logo.hAlign = 'CENTER'
+        try:
+            logo = self._create_logo(2.8 * inch, fallback_height=0.9 * inch)
+            if logo:
                 elements.append(logo)
                 elements.append(Spacer(1, 12))
-            except Exception as e:
-                # If logo loading fails, continue without logo
-                logging.error(f"Failed to load logo: {str(e)}")
-                pass
+        except Exception as e:
+            # If logo loading fails, continue without logo
+            logging.error(f"Failed to load logo: {str(e)}")
         
         # Company info in elegant style
         company_info = f"""
@@ -833,33 +1267,7 @@ class PDFGenerator:
         table = Table(data, colWidths=[col_width, col_width, col_width, col_width])
         
         # Style matching reference image
-        table.setStyle(TableStyle([
-            # Light grey background for labels (columns 0 and 2)
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F5F5F5')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#F5F5F5')),
-            
-            # White background for values (columns 1 and 3)
-            ('BACKGROUND', (1, 0), (1, -1), colors.white),
-            ('BACKGROUND', (3, 0), (3, -1), colors.white),
-            
-            # Light grey borders
-            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
-            ('INNERGRID', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
-            
-            # Left alignment for all cells
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            # Padding
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            
-            # Font
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ]))
+        table.setStyle(self.table_styles['quotation_details'])
         
         return [table]
     
@@ -878,19 +1286,7 @@ class PDFGenerator:
         ]
         
         info_table = Table(info_data, colWidths=[1.5*inch, 2*inch, 1.5*inch, 2*inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f3f4f6')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ]))
+        info_table.setStyle(self.table_styles['document_info'])
         elements.append(info_table)
         elements.append(Spacer(1, 15))
         
@@ -933,19 +1329,7 @@ class PDFGenerator:
         ]
         
         info_table = Table(info_data, colWidths=[1.5*inch, 2*inch, 1.5*inch, 2*inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f3f4f6')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ]))
+        info_table.setStyle(self.table_styles['document_info'])
         elements.append(info_table)
         elements.append(Spacer(1, 15))
         
@@ -964,22 +1348,48 @@ class PDFGenerator:
         
         return elements
     
-    def _create_items_table(self, items: list):
+    def _create_product_image(self, item: dict):
+        """Create the item table image sized to the cell, or None if the file is missing"""
+        # Prefer the upload-time thumbnail whose dimensions are stored on the item
+        thumb_path = item.get('thumbnail_url') and resolve_upload_path(item['thumbnail_url'])
+        if thumb_path and item.get('image_width') and item.get('image_height'):
+            width, height = _fit_to_cell(item['image_width'], item['image_height'], ITEM_IMAGE_SIZE)
+            if not PIL_AVAILABLE:
+                if thumb_path.exists():
+                    return Image(str(thumb_path), width=width, height=height)
+            else:
+                cached = image_cache.get(thumb_path)
+                if cached is not None:
+                    return CachedImageFlowable(cached, width, height)
+        
+        # Older items without a thumbnail: the cache knows the original image size
+        image_path = resolve_upload_path(item['image_url'])
+        if image_path is None:
+            return None
+        if not PIL_AVAILABLE:
+            # Fallback without PIL
+            if not image_path.exists():
+                return None
+            return Image(str(image_path), width=ITEM_IMAGE_SIZE, height=ITEM_IMAGE_SIZE)
+        cached = image_cache.get(image_path)
+        if cached is None:
+            return None
+        width, height = _fit_to_cell(cached.width, cached.height, ITEM_IMAGE_SIZE)
+        return CachedImageFlowable(cached, width, height)
+    
+    def _room_totals(self, document: dict) -> dict:
+        """Room totals stored on the document, keyed by room in display order"""
+        rooms = document.get('rooms')
+        if not rooms or 'positions' not in rooms[0]:
+            rooms = room_breakdown(document['items'])
+        return {room['room_area']: room for room in rooms}
+    
+    def _create_items_table(self, items: list, room_total: dict):
         """Create clean, modern, highly readable items table with product images"""
         elements = []
         
         # Premium table header styling with dark text on light background
-        header_style = ParagraphStyle(
-            'TableHeader',
-            parent=self.styles['Normal'],
-            fontSize=9,  # Reduced to fit in single line
-            textColor=self.header_text,
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER,
-            leading=11,
-            spaceBefore=0,
-            spaceAfter=0
-        )
+        header_style = self.paragraph_styles['TableHeader']
         
         # Create header row with clear labels
         data = [[
@@ -993,36 +1403,11 @@ class PDFGenerator:
         ]]
         
         # Content styling - professional and readable
-        content_style = ParagraphStyle(
-            'Content',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=self.text_color,
-            alignment=TA_LEFT,
-            leading=13,
-            spaceBefore=2,
-            spaceAfter=2
-        )
+        content_style = self.paragraph_styles['Content']
         
-        center_style = ParagraphStyle(
-            'CenterContent',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=self.text_color,
-            alignment=TA_CENTER,
-            leading=13,
-            fontName='Helvetica'
-        )
+        center_style = self.paragraph_styles['CenterContent']
         
-        right_style = ParagraphStyle(
-            'RightContent',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=self.text_color,
-            alignment=TA_RIGHT,
-            leading=13,
-            fontName='Helvetica'
-        )
+        right_style = self.paragraph_styles['RightContent']
         
         # Add items with professional blue-grey styling
         for idx, item in enumerate(items, 1):
@@ -1038,69 +1423,19 @@ class PDFGenerator:
                 content_style
             )
             
-            # Model number - centered
-            model_para = Paragraph(
-                f"<font size=10 color='#333333'>{item['model_no']}</font>",
-                center_style
-            )
-            
-            # Serial number - centered
-            sno_para = Paragraph(
-                f"<font size=10 color='#333333'>{str(idx)}</font>",
-                center_style
-            )
-            
-            # Quantity - right aligned
-            qty_para = Paragraph(
-                f"<font size=10 color='#333333'>{str(item['quantity'])}</font>",
-                right_style
-            )
-            
-            # Prices - right aligned
-            price_para = Paragraph(
-                f"<font size=10 color='#333333'>Rs. {item['offered_price']:,.0f}</font>",
-                right_style
-            )
-            
+            # Serial number and model number centered, quantity and prices right aligned
+            sno_cell = self._item_cell(str(idx), 0, center_style)
+            model_cell = self._item_cell(item['model_no'], 2, center_style)
+            qty_cell = self._item_cell(str(item['quantity']), 4, right_style)
+            price_cell = self._item_cell(f"Rs. {item['offered_price']:,.0f}", 5, right_style)
             # Total amount - right aligned and bold
-            amount_para = Paragraph(
-                f"<font size=10 color='#333333'><b>Rs. {item['total_amount']:,.0f}</b></font>",
-                right_style
-            )
+            amount_cell = self._item_cell(f"Rs. {item['total_amount']:,.0f}", 6, right_style, bold=True)
             
             # Handle product image with rounded corners effect
             image_cell = ''
             if item.get('image_url'):
                 try:
-                    # Convert URL path to file system path
-                    image_url = item['image_url']
-                    if image_url.startswith('/uploads/products/') or image_url.startswith('/api/uploads/products/'):
-                        image_path = Path('/app/backend/uploads/products') / image_url.split('/')[-1]
-                    else:
-                        # If full path is provided
-                        image_path = Path(image_url)
-                    
-                    if image_path.exists():
-                        # Create image with proper sizing and aspect ratio
-                        if PIL_AVAILABLE:
-                            pil_img = PILImage.open(str(image_path))
-                            img_width, img_height = pil_img.size
-                            aspect_ratio = img_height / img_width
-                            
-                            # Set optimal dimensions for table cell
-                            desired_width = 0.65 * inch
-                            calculated_height = desired_width * aspect_ratio
-                            
-                            # Limit height to maintain table consistency
-                            max_height = 0.65 * inch
-                            if calculated_height > max_height:
-                                calculated_height = max_height
-                                desired_width = calculated_height / aspect_ratio
-                            
-                            image_cell = Image(str(image_path), width=desired_width, height=calculated_height)
-                        else:
-                            # Fallback without PIL
-                            image_cell = Image(str(image_path), width=0.65*inch, height=0.65*inch)
+                    image_cell = self._create_product_image(item) or ''
                 except Exception as e:
                     logging.error(f"Failed to load product image: {str(e)}")
                     image_cell = Paragraph('<font size=7 color="#999999">No Image</font>', center_style)
@@ -1109,36 +1444,22 @@ class PDFGenerator:
             
             # Append row with all cells properly aligned
             data.append([
-                sno_para,
+                sno_cell,
                 image_cell,
-                model_para,
+                model_cell,
                 product_para,
-                qty_para,
-                price_para,
-                amount_para
+                qty_cell,
+                price_cell,
+                amount_cell
             ])
         
         # Total row styling - InHaus brand
-        total_label_style = ParagraphStyle(
-            'TotalLabel',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=self.total_text,
-            fontName='Helvetica-Bold',
-            alignment=TA_RIGHT
-        )
+        total_label_style = self.paragraph_styles['TotalLabel']
         
-        total_amount_style = ParagraphStyle(
-            'TotalAmount',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=self.total_text,
-            fontName='Helvetica-Bold',
-            alignment=TA_RIGHT
-        )
+        total_amount_style = self.paragraph_styles['TotalAmount']
         
-        total = sum(item['total_amount'] for item in items)
-        total_qty = sum(item['quantity'] for item in items)
+        total = room_total['subtotal']
+        total_qty = room_total['quantity']
         
         data.append([
             '', 
@@ -1151,76 +1472,35 @@ class PDFGenerator:
         ])
         
         # Optimized column widths for clarity - wider spacing
-        table = Table(data, colWidths=[0.4*inch, 0.75*inch, 0.95*inch, 2.45*inch, 0.5*inch, 1.05*inch, 1.15*inch])
-        
-        # Professional Blue-Grey Table with BOLD BLACK Borders
-        style_commands = [
-            # ========== HEADER - Consistent Light Blue-Grey ==========
-            ('BACKGROUND', (0, 0), (-1, 0), self.header_bg),  # Light blue-grey #D3DDF0
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.header_text),  # Dark grey text
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            
-            # ========== BOLD BLACK BORDERS ==========
-            ('BOX', (0, 0), (-1, -1), 2, colors.black),  # 2px BLACK outer border
-            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.black),  # 2px BLACK line under header
-            ('INNERGRID', (0, 0), (-1, -1), 1.5, colors.black),  # 1.5px BLACK grid
-            
-            # ========== ALIGNMENT - Professional Layout ==========
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # S.No centered
-            ('ALIGN', (1, 1), (1, -1), 'CENTER'),  # Image centered
-            ('ALIGN', (2, 1), (2, -1), 'CENTER'),  # Model No centered
-            ('ALIGN', (3, 1), (3, -1), 'LEFT'),    # Product Details left
-            ('ALIGN', (4, 1), (4, -1), 'RIGHT'),   # Qty right
-            ('ALIGN', (5, 1), (5, -1), 'RIGHT'),   # Price right
-            ('ALIGN', (6, 1), (6, -1), 'RIGHT'),   # Amount right
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            # ========== PADDING - Clean Spacing ==========
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 10),
-            
-            # ========== TOTAL ROW - Same Light Blue-Grey ==========
-            ('BACKGROUND', (0, -1), (-1, -1), self.total_bg),  # Same light blue-grey #D3DDF0
-            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),  # 2px BLACK line
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 10),
-            ('TOPPADDING', (0, -1), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, -1), (-1, -1), 12),
-        ]
+        table = Table(data, colWidths=ITEM_COL_WIDTHS)
         
-        # Clean alternating rows - white and very subtle blue tint
-        for i in range(1, len(data) - 1):
-            if i % 2 == 0:
-                style_commands.append(('BACKGROUND', (0, i), (-1, i), self.row_alt))  # Very light blue tint
-            else:
-                style_commands.append(('BACKGROUND', (0, i), (-1, i), colors.white))  # Pure white
-        
-        table.setStyle(TableStyle(style_commands))
+        # Clean alternating rows - white and very subtle blue tint. Set per row rather than with
+        # ROWBACKGROUNDS so the pattern continues instead of restarting when a table splits across pages
+        row_backgrounds = [
+            ('BACKGROUND', (0, i), (-1, i), self.row_alt if i % 2 == 0 else colors.white)
+            for i in range(1, len(data) - 1)
+        ]
+        table.setStyle(TableStyle(row_backgrounds, parent=self.table_styles['items']))
         
         elements.append(table)
         return elements
     
-    def _create_summary_table(self, quotation_data: dict, items_by_room: dict):
+    def _item_cell(self, text: str, col: int, style: ParagraphStyle, bold: bool = False):
+        """Items table text cell: a plain string styled by the table when it fits on one line,
+        otherwise a Paragraph so it wraps exactly as before"""
+        font_name = 'Helvetica-Bold' if bold else 'Helvetica'
+        if stringWidth(text, font_name, ITEM_CELL_FONT_SIZE) <= ITEM_COL_WIDTHS[col] - 2 * ITEM_CELL_PADDING:
+            return text
+        if bold:
+            text = f"<b>{text}</b>"
+        return Paragraph(f"<font size=10 color='#333333'>{text}</font>", style)
+    
+    def _create_summary_table(self, quotation_data: dict, room_totals: dict):
         """Create summary table with room totals - premium styling"""
         elements = []
         
         # Header with consistent styling
-        header_style = ParagraphStyle(
-            'SummaryHeader',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#333333'),
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER,
-            leading=13
-        )
+        header_style = self.paragraph_styles['SummaryHeader']
         
         data = [[
             Paragraph('<b>S.No</b>', header_style),
@@ -1229,36 +1509,14 @@ class PDFGenerator:
         ]]
         
         # Content styling - consistent colors
-        sno_style = ParagraphStyle(
-            'SummaryNumber',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_CENTER,
-            leading=13
-        )
+        sno_style = self.paragraph_styles['SummaryNumber']
         
-        room_style = ParagraphStyle(
-            'SummaryRoom',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#333333'),
-            alignment=TA_LEFT,
-            leading=13
-        )
+        room_style = self.paragraph_styles['SummaryRoom']
         
-        amount_style = ParagraphStyle(
-            'SummaryAmount',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#333333'),
-            fontName='Helvetica-Bold',
-            alignment=TA_RIGHT,
-            leading=13
-        )
+        amount_style = self.paragraph_styles['SummaryAmount']
         
-        for idx, (room, items) in enumerate(items_by_room.items(), 1):
-            room_total = sum(item['total_amount'] for item in items)
+        for idx, (room, totals) in enumerate(room_totals.items(), 1):
+            room_total = totals['subtotal']
             
             # Highlight room name with background color
             room_text = f"Scope of Automation - <b><font color='#FF6B35'>{room}</font></b>"
@@ -1290,64 +1548,20 @@ class PDFGenerator:
                      Paragraph(f"<font size=12 color='#333333'><b>Rs.  {quotation_data['total']:,.0f}</b></font>", self.heading_style)])
         
         table = Table(data, colWidths=[0.6*inch, 4.7*inch, 1.5*inch])
-        
-        # Premium table styling
-        style_commands = [
-            # Header styling - BLUE background
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D3DDF0')),  # Light blue
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#333333')),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Data rows - pure white with consistent color
-            ('BACKGROUND', (0, 1), (-1, -2), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -2), colors.HexColor('#333333')),
-            
-            # Grand total styling - BLUE background (same as header)
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#D3DDF0')),  # Light blue
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.HexColor('#333333')),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 11),
-            ('TOPPADDING', (0, -1), (-1, -1), 14),
-            ('BOTTOMPADDING', (0, -1), (-1, -1), 14),
-            ('LINEABOVE', (0, -1), (-1, -1), 2.5, colors.black),  # Thicker for emphasis
-            
-            # BOLD BLACK BORDERS - MORE PROMINENT
-            ('BOX', (0, 0), (-1, -1), 2.5, colors.black),  # Thicker outer border
-            ('LINEBELOW', (0, 0), (-1, 0), 2.5, colors.black),  # Thicker under header
-            ('INNERGRID', (0, 0), (-1, -1), 2, colors.black),  # Thicker grid
-            
-            # Alignment - all centered
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            # Padding
-            ('LEFTPADDING', (0, 1), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 1), (-1, -1), 12),
-            ('TOPPADDING', (0, 1), (-1, -2), 10),
-            ('BOTTOMPADDING', (0, 1), (-1, -2), 10),
-        ]
-        
-        # NO alternating colors - all room rows have pure white background (transparent)
-        # This ensures Hall, Bed room, kitchen all look the same
-        
-        table.setStyle(TableStyle(style_commands))
+        table.setStyle(self.table_styles['summary'])
         
         elements.append(table)
         return elements
     
-    def _create_invoice_summary_table(self, invoice_data: dict, items_by_room: dict):
+    def _create_invoice_summary_table(self, invoice_data: dict, room_totals: dict):
         """Create summary table for invoice"""
         elements = []
         
         # Room-wise summary
         data = [['S.No', 'Description', 'Amount']]
         
-        for idx, (room, items) in enumerate(items_by_room.items(), 1):
-            room_total = sum(item['total_amount'] for item in items)
+        for idx, (room, totals) in enumerate(room_totals.items(), 1):
+            room_total = totals['subtotal']
             data.append([str(idx), room, f"Rs.  {room_total:,.2f}"])
         
         # Add pricing breakdown
@@ -1365,19 +1579,7 @@ class PDFGenerator:
                      Paragraph(f"<b>Rs.  {invoice_data['total']:,.2f}</b>", self.heading_style)])
         
         table = Table(data, colWidths=[0.8*inch, 4.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f97316')),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        table.setStyle(self.table_styles['invoice_summary'])
         
         elements.append(table)
         return elements
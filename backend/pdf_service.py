@@ -0,0 +1,107 @@
+"""Process-pool PDF rendering service.
+
+ReportLab rendering is CPU-bound and synchronous, so running it inside an
+``async def`` handler blocks the event loop for the whole render. The
+PDFRenderService pushes renders onto a bounded pool of worker processes,
+each holding its own PDFGenerator, and awaits the result.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from pdf_generator import PDFGenerator
+
+logger = logging.getLogger(__name__)
+
+# Per-process generator, created once by the pool initializer
+_worker_generator = None
+
+
+def _init_worker():
+    global _worker_generator
+    _worker_generator = PDFGenerator()
+
+
+def _render(kind: str, data: dict, settings_data: dict, output_path: Optional[str]):
+    """Render a document inside a worker process; without output_path the PDF bytes are returned"""
+    if kind == 'quotation':
+        return _worker_generator.generate_quotation_pdf(data, settings_data, output_path)
+    if kind == 'invoice':
+        return _worker_generator.generate_invoice_pdf(data, settings_data, output_path)
+    raise ValueError(f"Unknown document kind: {kind}")
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue is at its configured depth"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render job does not finish within the configured timeout"""
+
+
+class PDFRenderService:
+    """Bounded process pool for quotation and invoice rendering.
+
+    Settings (constructor arguments override the environment):
+      PDF_RENDER_WORKERS   - number of worker processes (default: CPU count)
+      PDF_RENDER_MAX_QUEUE - max jobs running or waiting before new ones are rejected
+      PDF_RENDER_TIMEOUT   - seconds to wait for a single job
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None, timeout: float = None):
+        self.max_workers = max_workers or int(os.environ.get('PDF_RENDER_WORKERS', os.cpu_count() or 1))
+        self.max_queue = max_queue or int(os.environ.get('PDF_RENDER_MAX_QUEUE', self.max_workers * 4))
+        self.timeout = timeout or float(os.environ.get('PDF_RENDER_TIMEOUT', 60))
+        self._executor = None
+        self._pending = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn keeps the Mongo client and event loop threads out of the workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently running or waiting for a worker"""
+        return self._pending
+
+    async def render_quotation(self, quotation_data: dict, settings_data: dict, output_path: Optional[str] = None):
+        """Render to output_path and return it, or return the PDF bytes if no path is given"""
+        return await self._submit('quotation', quotation_data, settings_data, output_path)
+
+    async def render_invoice(self, invoice_data: dict, settings_data: dict, output_path: Optional[str] = None):
+        """Render to output_path and return it, or return the PDF bytes if no path is given"""
+        return await self._submit('invoice', invoice_data, settings_data, output_path)
+
+    async def _submit(self, kind: str, data: dict, settings_data: dict, output_path: Optional[str]):
+        if self._pending >= self.max_queue:
+            raise RenderQueueFull(f"PDF render queue is full ({self.max_queue} jobs)")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), _render, kind, data, settings_data, output_path)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            # The worker cannot be interrupted; it finishes in the background and its result is dropped
+            raise RenderTimeout(f"PDF rendering exceeded {self.timeout:.0f}s")
+        except BrokenProcessPool:
+            logger.error("PDF render pool broke, it will be recreated on the next job")
+            self._executor = None
+            raise
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
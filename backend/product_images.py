@@ -0,0 +1,87 @@
+"""Product image thumbnails for PDF item tables.
+
+Item tables show product images in a 0.65 inch cell. Uploads are reduced once
+to a flattened JPEG sized for that cell (150 dpi), and the image dimensions are
+stored with the product so renders never have to open the file with PIL.
+"""
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image as PILImage, ImageOps
+
+THUMBNAIL_DPI = 150
+THUMBNAIL_CELL_INCHES = 0.65
+THUMBNAIL_SIZE_PX = round(THUMBNAIL_DPI * THUMBNAIL_CELL_INCHES)
+
+UPLOADS_URL_PREFIX = "/api/uploads/products/"
+THUMBNAILS_DIRNAME = "thumbs"
+
+EXIF_ORIENTATION = 0x0112
+
+
+def thumbnail_filename(image_filename: str) -> str:
+    return f"{Path(image_filename).stem}.jpg"
+
+
+def thumbnail_url(image_url: str) -> str:
+    return f"{UPLOADS_URL_PREFIX}{THUMBNAILS_DIRNAME}/{thumbnail_filename(image_url.split('/')[-1])}"
+
+
+def create_thumbnail(source, uploads_dir: Path, image_filename: str) -> dict:
+    """Write the PDF thumbnail for an uploaded product image.
+
+    source is a path or the raw upload bytes. Returns the thumbnail URL and the
+    original image dimensions (the thumbnail keeps the same aspect ratio).
+    """
+    img = PILImage.open(BytesIO(source) if isinstance(source, bytes) else source)
+    img = ImageOps.exif_transpose(img)
+    width, height = img.size
+
+    # Flatten transparency onto white so the thumbnail can be a plain JPEG
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = PILImage.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    else:
+        img = img.convert('RGB')
+
+    img.thumbnail((THUMBNAIL_SIZE_PX, THUMBNAIL_SIZE_PX), PILImage.LANCZOS)
+
+    thumbs_dir = Path(uploads_dir) / THUMBNAILS_DIRNAME
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+    output_path = thumbs_dir / thumbnail_filename(image_filename)
+    temp_path = output_path.with_suffix('.tmp')
+    img.save(temp_path, 'JPEG', quality=88, optimize=True)
+    os.replace(temp_path, output_path)
+
+    return {
+        "thumbnail_url": thumbnail_url(image_filename),
+        "image_width": width,
+        "image_height": height
+    }
+
+
+def image_metadata(image_url: Optional[str], uploads_dir: Path) -> dict:
+    """Thumbnail URL and dimensions for a product image URL, creating the thumbnail if missing"""
+    empty = {"thumbnail_url": None, "image_width": None, "image_height": None}
+    if not image_url or not image_url.startswith(("/uploads/products/", UPLOADS_URL_PREFIX)):
+        return empty
+
+    image_filename = image_url.split('/')[-1]
+    image_path = Path(uploads_dir) / image_filename
+    if not image_path.exists():
+        return empty
+
+    thumb_path = Path(uploads_dir) / THUMBNAILS_DIRNAME / thumbnail_filename(image_filename)
+    if not thumb_path.exists():
+        return create_thumbnail(image_path, uploads_dir, image_filename)
+
+    # Opening only reads the header, the pixels are never decoded here
+    with PILImage.open(image_path) as img:
+        width, height = img.size
+        if img.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+            width, height = height, width  # rotated by 90 degrees, as exif_transpose would
+    return {"thumbnail_url": thumbnail_url(image_filename), "image_width": width, "image_height": height}
@@ -1,26 +1,43 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Request, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Any
 import uuid
+import re
 from datetime import datetime, timezone, timedelta, date
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
-from pdf_generator import PDFGenerator
+from pdf_generator import COVER_IMAGE_PATH, prepare_cover_image
+from pdf_service import PDFRenderService, RenderQueueFull, RenderTimeout
+from pdf_cache import PDFCache, write_atomic
+from mailer import SMTPPool
+from outbox import Outbox
+from settings_cache import SettingsCache
+from token_cache import TokenCache
+from passwords import PasswordHasher, TooManyAttempts, HasherBusy
+from activity_log import ActivityLogWriter
+from product_images import create_thumbnail, image_metadata
+from zip_stream import zip_stream
+from migrations import seed_counters, backfill_datetimes, backfill_room_totals
+from indexes import ensure_indexes
+from totals import quotation_totals, invoice_totals, price_items, room_breakdown
+from listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, datetime_bound, paginate, NEXT_CURSOR_HEADER
 import jwt
-from passlib.context import CryptContext
 import shutil
+import ipaddress
+from contextlib import contextmanager
 
 
 ROOT_DIR = Path(__file__).parent
@@ -28,16 +45,42 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
-# PDF Generator
-pdf_generator = PDFGenerator()
+# Outgoing email is queued in Mongo and delivered by background workers
+email_outbox = Outbox(
+    db.email_jobs,
+    max_attempts=int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5)),
+    workers=int(os.environ.get('EMAIL_WORKERS', 1))
+)
+
+# Activity log entries are buffered in memory and written in batches
+activity_log = ActivityLogWriter(
+    db.activity_logs,
+    batch_size=int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 200)),
+    flush_interval=float(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1)),
+    max_buffer=int(os.environ.get('ACTIVITY_LOG_MAX_BUFFER', 10000)),
+    overflow=os.environ.get('ACTIVITY_LOG_OVERFLOW', 'drop')
+)
+
+# PDF rendering runs in a bounded process pool so it never blocks the event loop
+pdf_render_service = PDFRenderService()
 
 # Create PDFs directory if it doesn't exist
 PDF_DIR = ROOT_DIR / 'pdfs'
 PDF_DIR.mkdir(exist_ok=True)
 
+# Rendered PDFs keyed by a hash of document + settings + template version
+pdf_cache = PDFCache(PDF_DIR / 'cache')
+
+# Company settings are kept in memory and reloaded when any process saves them
+settings_cache = SettingsCache(
+    db.settings,
+    defaults=lambda: Settings().model_dump(),
+    poll_interval=float(os.environ.get('SETTINGS_POLL_INTERVAL', 5))
+)
+
 # Create uploads directory for product images
 UPLOADS_DIR = ROOT_DIR / 'uploads' / 'products'
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
@@ -48,14 +91,36 @@ SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
 SMTP_USER = os.environ.get('SMTP_USER', '')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
 NOTIFICATION_EMAIL = os.environ.get('NOTIFICATION_EMAIL', '')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() != 'false'
+
+# Authenticated SMTP sessions are kept open and shared by all outgoing mail
+mail_transport = SMTPPool(
+    SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD,
+    starttls=SMTP_STARTTLS,
+    size=int(os.environ.get('SMTP_POOL_SIZE', 2))
+)
 
 # Admin authentication
 ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
 JWT_SECRET = os.environ.get('JWT_SECRET', 'secret_key')
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs on a bounded thread pool with per-client and per-account attempt limits
+password_hasher = PasswordHasher()
+
+# Reverse proxies trusted to report the client address in X-Forwarded-For: addresses or
+# networks, comma separated, or "*" for any peer. Same setting and default as uvicorn.
+FORWARDED_ALLOW_IPS = [
+    entry.strip() if entry.strip() == "*" else ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1').split(',') if entry.strip()
+]
 security = HTTPBearer()
 
+# Verified token payloads, so most requests skip the signature check and the user lookup
+token_cache = TokenCache(
+    max_entries=int(os.environ.get('TOKEN_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('TOKEN_CACHE_TTL', 60))
+)
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -123,9 +188,22 @@ class User(BaseModel):
     password_hash: str
     role: str = "user"  # "admin" or "user"
     status: str = "pending"  # "pending", "approved", "denied"
+    token_version: int = 0  # Bumped to revoke every token issued to the user
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     last_login: Optional[datetime] = None
 
+class UserSummary(BaseModel):
+    """User list entry, without the password hash"""
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    email: EmailStr
+    name: str
+    role: str = "user"
+    status: str = "pending"
+    created_at: datetime
+    last_login: Optional[datetime] = None
+
 class UserRegister(BaseModel):
     email: EmailStr
     name: str
@@ -157,6 +235,10 @@ class ProductMaster(BaseModel):
     description: str
     category: Optional[str] = None
     image_url: Optional[str] = None
+    # PDF thumbnail and original image size, filled in from image_url on write
+    thumbnail_url: Optional[str] = None
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
     list_price: float
     company_cost: float
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -188,6 +270,9 @@ class QuotationItem(BaseModel):
     product_name: str
     description: str
     image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
     quantity: int
     list_price: float
     discount: float = 0
@@ -196,6 +281,18 @@ class QuotationItem(BaseModel):
     total_amount: float  # offered_price * quantity
     total_company_cost: float  # company_cost * quantity
 
+class RoomSummary(BaseModel):
+    """Precomputed totals for one room, in order of the room's first item"""
+    room_area: str
+    item_count: int = 0
+    quantity: int = 0
+    subtotal: float = 0
+    company_cost: float = 0
+    margin: float = 0
+
+class RoomTotal(RoomSummary):
+    positions: List[int] = []  # Indexes of the room's items in the items array
+
 class QuotationItemCreate(BaseModel):
     room_area: str
     product_id: Optional[str] = None
@@ -226,6 +323,7 @@ class Quotation(BaseModel):
     
     # Quotation details
     items: List[QuotationItem] = []
+    rooms: List[RoomTotal] = []
     
     # Pricing
     subtotal: float = 0
@@ -252,6 +350,45 @@ class Quotation(BaseModel):
     assigned_to: List[str] = []  # List of user IDs who can edit this quotation
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     sent_at: Optional[datetime] = None
+
+class QuotationSummary(BaseModel):
+    """Quotation list entry, without the items"""
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    quote_number: str
+    revision_no: int = 0
+    customer_name: str
+    customer_email: EmailStr
+    customer_phone: Optional[str] = None
+    site_location: Optional[str] = None
+    total: float = 0
+    profit_margin: float = 0
+    rooms: List[RoomSummary] = []
+    status: str = "draft"
+    created_at: datetime
+    created_by: Optional[str] = None
+    updated_at: datetime
+    sent_at: Optional[datetime] = None
+
+class QuotationTotals(BaseModel):
+    """Pricing and per-room breakdown of a quotation, without the items"""
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    quote_number: str
+    customer_name: str
+    subtotal: float = 0
+    overall_discount: float = 0
+    net_quote: float = 0
+    installation_charges: float = 0
+    gst_percentage: float = 18
+    gst_amount: float = 0
+    total: float = 0
+    total_company_cost: float = 0
+    profit_margin: float = 0
+    item_count: int = 0
+    rooms: List[RoomSummary] = []
     
 class QuotationCreate(BaseModel):
     customer_name: str
@@ -284,6 +421,27 @@ class QuotationUpdate(BaseModel):
     terms_conditions: Optional[str] = None
     status: Optional[str] = None
 
+class QuotationItemUpdate(BaseModel):
+    room_area: Optional[str] = None
+    product_id: Optional[str] = None
+    model_no: Optional[str] = None
+    product_name: Optional[str] = None
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    quantity: Optional[int] = None
+    list_price: Optional[float] = None
+    discount: Optional[float] = None
+    offered_price: Optional[float] = None
+    company_cost: Optional[float] = None
+
+class QuotationItemMove(BaseModel):
+    position: int = Field(ge=0)
+
+class QuotationItemResult(BaseModel):
+    """A changed line item with the quotation's recalculated totals"""
+    item: Optional[QuotationItem] = None
+    summary: QuotationTotals
+
 class Invoice(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -300,6 +458,7 @@ class Invoice(BaseModel):
     
     # Invoice details
     items: List[QuotationItem] = []
+    rooms: List[RoomTotal] = []
     
     # Pricing
     subtotal: float = 0
@@ -325,6 +484,27 @@ class Invoice(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     sent_at: Optional[datetime] = None
 
+class InvoiceSummary(BaseModel):
+    """Invoice list entry, without the items"""
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    invoice_number: str
+    quotation_id: Optional[str] = None
+    customer_name: str
+    customer_email: EmailStr
+    customer_phone: Optional[str] = None
+    total: float = 0
+    amount_paid: float = 0
+    amount_due: float = 0
+    payment_status: str = "pending"
+    invoice_date: date
+    due_date: Optional[date] = None
+    status: str = "draft"
+    created_at: datetime
+    updated_at: datetime
+    sent_at: Optional[datetime] = None
+
 class InvoiceCreate(BaseModel):
     quotation_id: Optional[str] = None
     customer_name: str
@@ -371,8 +551,15 @@ class Settings(BaseModel):
     terms_template: Optional[str] = None
     warranty_info: Optional[str] = None
 
+class PDFExportRequest(BaseModel):
+    """Selects the documents for a bulk PDF export; at least one filter is required"""
+    ids: Optional[List[str]] = None
+    status: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
 # Email sending function
-async def send_email_notification(contact_data: dict):
+async def send_email_notification(contact_data: dict, submitted_at: datetime):
     """Send email notification when a new contact form is submitted"""
     try:
         msg = MIMEMultipart('alternative')
@@ -392,7 +579,7 @@ async def send_email_notification(contact_data: dict):
               <p style="background-color: white; padding: 10px; border-left: 3px solid #f97316;">
                 {contact_data['message']}
               </p>
-              <p><strong>Submitted:</strong> {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+              <p><strong>Submitted:</strong> {datetime_bound(submitted_at).strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
             </div>
             <p style="color: #666; font-size: 12px;">
               This is an automated notification from InHaus Smart Home contact form.
@@ -403,10 +590,7 @@ async def send_email_notification(contact_data: dict):
         
         msg.attach(MIMEText(html_content, 'html'))
         
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
+        await mail_transport.send(msg)
         
         logger.info(f"Email notification sent for contact from {contact_data['name']}")
         return True
@@ -424,17 +608,26 @@ def create_access_token(data: dict):
 
 # Verify JWT token
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    # The main admin has no user record; everyone else's token must match their current token version
+    if payload.get("sub") != ADMIN_USERNAME:
+        user = await db.users.find_one({"id": payload.get("user_id")}, {"_id": 0, "token_version": 1})
+        if not user or user.get("token_version", 0) != payload.get("ver", 0):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+    token_cache.put(token, payload)
+    return payload
 
 async def log_activity(user_id: str, user_email: str, action: str, resource_type: str, resource_id: str = None, details: str = None):
-    """Log user activity"""
+    """Log user activity; the entry is buffered and written in the background"""
     try:
         log_entry = ActivityLog(
             user_id=user_id,
@@ -444,19 +637,16 @@ async def log_activity(user_id: str, user_email: str, action: str, resource_type
             resource_id=resource_id,
             details=details
         )
-        doc = log_entry.model_dump()
-        doc['timestamp'] = doc['timestamp'].isoformat()
-        await db.activity_logs.insert_one(doc)
+        await activity_log.log(log_entry.model_dump())
     except Exception as e:
         logger.error(f"Failed to log activity: {str(e)}")
 
 async def check_admin(payload: dict):
-    """Check if user is admin"""
-    user_email = payload.get("sub")
-    if user_email == ADMIN_USERNAME:
+    """Check if user is admin, from the role and status claims of the verified token"""
+    if payload.get("sub") == ADMIN_USERNAME:
         return True
-    user = await db.users.find_one({"email": user_email, "role": "admin", "status": "approved"}, {"_id": 0})
-    return user is not None
+    # Tokens issued before the status claim existed were only ever given to approved users
+    return payload.get("role") == "admin" and payload.get("status", "approved") == "approved"
 
 async def check_quotation_access(quotation_id: str, user_id: str, is_admin: bool):
     """Check if user can edit quotation"""
@@ -478,24 +668,18 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
-    # Convert to dict and serialize datetime to ISO string for MongoDB
     doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
     
     _ = await db.status_checks.insert_one(doc)
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
-    
-    return status_checks
+async def get_status_checks(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-timestamp"
+):
+    return await paginate(db.status_checks, {}, StatusCheck, sort=sort, sortable=("timestamp", "client_name"), limit=limit, cursor=cursor)
 
 @api_router.post("/contact", response_model=ContactSubmission)
 async def create_contact_submission(input: ContactSubmissionCreate):
@@ -504,17 +688,20 @@ async def create_contact_submission(input: ContactSubmissionCreate):
         contact_dict = input.model_dump()
         contact_obj = ContactSubmission(**contact_dict)
         
-        # Convert to dict and serialize datetime to ISO string for MongoDB
         doc = contact_obj.model_dump()
-        doc['timestamp'] = doc['timestamp'].isoformat()
         
         result = await db.contact_submissions.insert_one(doc)
         
         if not result.inserted_id:
             raise HTTPException(status_code=500, detail="Failed to save contact submission")
         
-        # Send email notification (non-blocking)
-        await send_email_notification(contact_dict)
+        # Notify the team in the background; the submission is already saved
+        try:
+            await email_outbox.enqueue(
+                "contact_notification", {"contact_id": contact_obj.id, "submitted_at": contact_obj.timestamp}
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue contact notification: {str(e)}")
         
         return contact_obj
     except Exception as e:
@@ -522,18 +709,18 @@ async def create_contact_submission(input: ContactSubmissionCreate):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @api_router.get("/contact", response_model=List[ContactSubmission])
-async def get_contact_submissions():
-    """Get all contact form submissions"""
+async def get_contact_submissions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-timestamp",
+    status: Optional[str] = None
+):
+    """List contact form submissions, newest first"""
     try:
-        # Exclude MongoDB's _id field from the query results
-        contacts = await db.contact_submissions.find({}, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-        
-        # Convert ISO string timestamps back to datetime objects
-        for contact in contacts:
-            if isinstance(contact['timestamp'], str):
-                contact['timestamp'] = datetime.fromisoformat(contact['timestamp'])
-        
-        return contacts
+        query = {"status": status} if status else {}
+        return await paginate(db.contact_submissions, query, ContactSubmission, sort=sort, sortable=("timestamp", "name", "status"), limit=limit, cursor=cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching contact submissions: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -546,10 +733,6 @@ async def get_contact_submission(contact_id: str):
         if not contact:
             raise HTTPException(status_code=404, detail="Contact submission not found")
         
-        # Convert ISO string timestamp back to datetime object
-        if isinstance(contact['timestamp'], str):
-            contact['timestamp'] = datetime.fromisoformat(contact['timestamp'])
-        
         return ContactSubmission(**contact)
     except HTTPException:
         raise
@@ -557,32 +740,73 @@ async def get_contact_submission(contact_id: str):
         logger.error(f"Error fetching contact submission: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(entry == "*" or ip in entry for entry in FORWARDED_ALLOW_IPS)
+
+def client_ip(request: Request) -> str:
+    """The client's address, taken from X-Forwarded-For when the request came through trusted proxies"""
+    peer = request.client.host if request.client else "unknown"
+    if not is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    # Each proxy appends the address it received the request from; the first untrusted hop from the right is the client
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+@contextmanager
+def password_attempt(request: Request, account: str):
+    """Hold a password hashing slot, mapping the hasher's limits to HTTP errors"""
+    try:
+        with password_hasher.attempt(client_ip(request), account):
+            yield
+    except TooManyAttempts:
+        raise HTTPException(status_code=429, detail="Too many attempts, please retry shortly")
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly")
+
 @api_router.post("/admin/login")
-async def admin_login(credentials: AdminLogin):
+async def admin_login(credentials: AdminLogin, request: Request):
     """Admin/User login endpoint"""
     # Check if it's the main admin
     if credentials.username == ADMIN_USERNAME and credentials.password == ADMIN_PASSWORD:
-        access_token = create_access_token({"sub": credentials.username, "user_id": "admin", "role": "admin"})
+        access_token = create_access_token({"sub": credentials.username, "user_id": "admin", "role": "admin", "status": "approved"})
         await log_activity("admin", ADMIN_USERNAME, "login", "auth")
         return {"access_token": access_token, "token_type": "bearer", "role": "admin", "user_id": "admin"}
     
     # Check if it's a registered user
     user = await db.users.find_one({"email": credentials.username}, {"_id": 0})
     if user and user.get("status") == "approved":
-        if pwd_context.verify(credentials.password, user["password_hash"]):
-            # Update last login
+        with password_attempt(request, credentials.username):
+            valid, new_hash = await password_hasher.verify_and_update(credentials.password, user["password_hash"])
+        if valid:
+            # Update last login, upgrading the stored hash if it was made with an older cost factor
+            update = {"last_login": datetime.now(timezone.utc)}
+            if new_hash:
+                update["password_hash"] = new_hash
             await db.users.update_one(
                 {"id": user["id"]},
-                {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
+                {"$set": update}
             )
-            access_token = create_access_token({"sub": user["email"], "user_id": user["id"], "role": user["role"]})
+            access_token = create_access_token({
+                "sub": user["email"],
+                "user_id": user["id"],
+                "role": user["role"],
+                "status": user["status"],
+                "ver": user.get("token_version", 0)
+            })
             await log_activity(user["id"], user["email"], "login", "auth")
             return {"access_token": access_token, "token_type": "bearer", "role": user["role"], "user_id": user["id"]}
     
     raise HTTPException(status_code=401, detail="Invalid credentials or account not approved")
 
 @api_router.post("/register")
-async def register_user(user_data: UserRegister):
+async def register_user(user_data: UserRegister, request: Request):
     """User registration endpoint"""
     try:
         # Check if user already exists
@@ -591,7 +815,8 @@ async def register_user(user_data: UserRegister):
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Hash password
-        password_hash = pwd_context.hash(user_data.password)
+        with password_attempt(request, user_data.email):
+            password_hash = await password_hasher.hash(user_data.password)
         
         # Create user
         user = User(
@@ -603,7 +828,6 @@ async def register_user(user_data: UserRegister):
         )
         
         doc = user.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
         
         await db.users.insert_one(doc)
         
@@ -644,24 +868,27 @@ async def get_current_user(payload: dict = Depends(verify_token)):
         logger.error(f"Error fetching current user: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/users", response_model=List[dict])
-async def get_users(payload: dict = Depends(verify_token)):
-    """Get all users (admin only)"""
+@api_router.get("/users", response_model=List[UserSummary])
+async def get_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-created_at",
+    status: Optional[str] = None,
+    role: Optional[str] = None,
+    payload: dict = Depends(verify_token)
+):
+    """List users (admin only)"""
     try:
         is_admin = await check_admin(payload)
         if not is_admin:
             raise HTTPException(status_code=403, detail="Admin access required")
         
-        users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-        
-        # Convert datetime fields
-        for user in users:
-            if isinstance(user.get('created_at'), str):
-                user['created_at'] = datetime.fromisoformat(user['created_at'])
-            if user.get('last_login') and isinstance(user['last_login'], str):
-                user['last_login'] = datetime.fromisoformat(user['last_login'])
-        
-        return users
+        query = {}
+        if status:
+            query["status"] = status
+        if role:
+            query["role"] = role
+        return await paginate(db.users, query, UserSummary, sort=sort, sortable=("created_at", "name", "email"), limit=limit, cursor=cursor)
     except HTTPException:
         raise
     except Exception as e:
@@ -679,13 +906,15 @@ async def approve_user(user_id: str, approval: UserApproval, payload: dict = Dep
         if approval.status not in ["approved", "denied"]:
             raise HTTPException(status_code=400, detail="Status must be 'approved' or 'denied'")
         
+        # The status is a signed claim, so tokens issued under the old status are revoked
         result = await db.users.update_one(
             {"id": user_id},
-            {"$set": {"status": approval.status}}
+            {"$set": {"status": approval.status}, "$inc": {"token_version": 1}}
         )
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
+        token_cache.revoke_user(user_id)
         
         user = await db.users.find_one({"id": user_id}, {"_id": 0})
         await log_activity(payload.get("user_id"), payload.get("sub"), "update", "user", user_id, f"User {approval.status}")
@@ -697,22 +926,50 @@ async def approve_user(user_id: str, approval: UserApproval, payload: dict = Dep
         logger.error(f"Error approving user: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/activity-logs", response_model=List[dict])
-async def get_activity_logs(payload: dict = Depends(verify_token), limit: int = 100):
-    """Get activity logs (admin only)"""
+@api_router.get("/activity-logs", response_model=List[ActivityLog])
+async def get_activity_logs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-timestamp",
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    payload: dict = Depends(verify_token)
+):
+    """List activity logs newest first (admin only).
+
+    The user, action and resource filters each have an index on (field, timestamp, id);
+    resource_id is indexed under resource_type, so it must be given with it.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
         is_admin = await check_admin(payload)
         if not is_admin:
             raise HTTPException(status_code=403, detail="Admin access required")
         
-        logs = await db.activity_logs.find({}, {"_id": 0}).sort("timestamp", -1).to_list(limit)
-        
-        # Convert datetime fields
-        for log in logs:
-            if isinstance(log.get('timestamp'), str):
-                log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-        
-        return logs
+        if resource_id and not resource_type:
+            raise HTTPException(status_code=400, detail="resource_id requires resource_type")
+        
+        query = {}
+        if user_id:
+            query["user_id"] = user_id
+        if action:
+            query["action"] = action
+        if resource_type:
+            query["resource_type"] = resource_type
+        if resource_id:
+            query["resource_id"] = resource_id
+        if created_from or created_to:
+            query["timestamp"] = {}
+            if created_from:
+                query["timestamp"]["$gte"] = datetime_bound(created_from)
+            if created_to:
+                query["timestamp"]["$lt"] = datetime_bound(created_to)
+        
+        return await paginate(db.activity_logs, query, ActivityLog, sort=sort, sortable=("timestamp",), limit=limit, cursor=cursor)
     except HTTPException:
         raise
     except Exception as e:
@@ -763,13 +1020,20 @@ async def upload_product_image(file: UploadFile = File(...), payload: dict = Dep
         unique_filename = f"{uuid.uuid4()}.{file_extension}"
         file_path = UPLOADS_DIR / unique_filename
         
+        # Build the PDF thumbnail first so undecodable uploads are rejected before anything is saved
+        try:
+            metadata = await asyncio.to_thread(create_thumbnail, file_content, UPLOADS_DIR, unique_filename)
+        except Exception as e:
+            logger.error(f"Invalid image upload: {str(e)}")
+            raise HTTPException(status_code=400, detail="File is not a valid image")
+        
         # Save file
         with open(file_path, "wb") as buffer:
             buffer.write(file_content)
         
         # Return the URL path with /api prefix to match static files mount
         image_url = f"/api/uploads/products/{unique_filename}"
-        return {"image_url": image_url, "message": "Image uploaded successfully"}
+        return {"image_url": image_url, **metadata, "message": "Image uploaded successfully"}
     
     except HTTPException:
         raise
@@ -782,11 +1046,10 @@ async def create_product(input: ProductMasterCreate, payload: dict = Depends(ver
     """Create a new product in master catalog (admin only)"""
     try:
         product_dict = input.model_dump()
+        product_dict.update(await asyncio.to_thread(image_metadata, input.image_url, UPLOADS_DIR))
         product_obj = ProductMaster(**product_dict)
         
         doc = product_obj.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
         
         await db.products.insert_one(doc)
         return product_obj
@@ -795,18 +1058,25 @@ async def create_product(input: ProductMasterCreate, payload: dict = Depends(ver
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @api_router.get("/products", response_model=List[ProductMaster])
-async def get_products(payload: dict = Depends(verify_token)):
-    """Get all products from master catalog (admin only)"""
+async def get_products(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-created_at",
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    payload: dict = Depends(verify_token)
+):
+    """List products from master catalog (admin only)"""
     try:
-        products = await db.products.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-        
-        for product in products:
-            if isinstance(product['created_at'], str):
-                product['created_at'] = datetime.fromisoformat(product['created_at'])
-            if isinstance(product['updated_at'], str):
-                product['updated_at'] = datetime.fromisoformat(product['updated_at'])
-        
-        return products
+        query = {}
+        if category:
+            query["category"] = category
+        if search:
+            pattern = {"$regex": re.escape(search), "$options": "i"}
+            query["$or"] = [{"name": pattern}, {"model_no": pattern}]
+        return await paginate(db.products, query, ProductMaster, sort=sort, sortable=("created_at", "name", "model_no", "list_price"), limit=limit, cursor=cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching products: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -819,11 +1089,6 @@ async def get_product(product_id: str, payload: dict = Depends(verify_token)):
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        if isinstance(product['created_at'], str):
-            product['created_at'] = datetime.fromisoformat(product['created_at'])
-        if isinstance(product['updated_at'], str):
-            product['updated_at'] = datetime.fromisoformat(product['updated_at'])
-        
         return ProductMaster(**product)
     except HTTPException:
         raise
@@ -839,7 +1104,10 @@ async def update_product(product_id: str, update: ProductMasterUpdate, payload:
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+        if 'image_url' in update_data:
+            update_data.update(await asyncio.to_thread(image_metadata, update_data['image_url'], UPLOADS_DIR))
+        
+        update_data['updated_at'] = datetime.now(timezone.utc)
         
         result = await db.products.update_one(
             {"id": product_id},
@@ -850,10 +1118,6 @@ async def update_product(product_id: str, update: ProductMasterUpdate, payload:
             raise HTTPException(status_code=404, detail="Product not found")
         
         product = await db.products.find_one({"id": product_id}, {"_id": 0})
-        if isinstance(product['created_at'], str):
-            product['created_at'] = datetime.fromisoformat(product['created_at'])
-        if isinstance(product['updated_at'], str):
-            product['updated_at'] = datetime.fromisoformat(product['updated_at'])
         
         return ProductMaster(**product)
     except HTTPException:
@@ -878,30 +1142,52 @@ async def delete_product(product_id: str, payload: dict = Depends(verify_token))
 
 # ============= QUOTATION ENDPOINTS =============
 
-def calculate_quotation_totals(items: List[QuotationItem], overall_discount: float, 
-                               installation_charges: float, gst_percentage: float) -> Dict[str, float]:
-    """Helper function to calculate quotation totals"""
-    subtotal = sum(item.total_amount for item in items)
-    net_quote = subtotal - overall_discount
-    total_before_gst = net_quote + installation_charges
-    gst_amount = (total_before_gst * gst_percentage) / 100
-    total = total_before_gst + gst_amount
-    total_company_cost = sum(item.total_company_cost for item in items)
-    profit_margin = total - total_company_cost - gst_amount
-    
-    return {
-        "subtotal": round(subtotal, 2),
-        "net_quote": round(net_quote, 2),
-        "gst_amount": round(gst_amount, 2),
-        "total": round(total, 2),
-        "total_company_cost": round(total_company_cost, 2),
-        "profit_margin": round(profit_margin, 2)
+async def attach_item_image_metadata(items: List[dict]):
+    """Copy product thumbnail metadata onto line items so PDF rendering never opens images to size them"""
+    product_ids = {
+        item['product_id'] for item in items
+        if item.get('product_id') and item.get('image_url') and not item.get('thumbnail_url')
     }
+    if not product_ids:
+        return
+    
+    products = await db.products.find(
+        {"id": {"$in": list(product_ids)}},
+        {"_id": 0, "id": 1, "image_url": 1, "thumbnail_url": 1, "image_width": 1, "image_height": 1}
+    ).to_list(len(product_ids))
+    products_by_id = {product['id']: product for product in products}
+    
+    for item in items:
+        product = products_by_id.get(item.get('product_id'))
+        if product and not item.get('thumbnail_url') and product.get('image_url') == item.get('image_url'):
+            item['thumbnail_url'] = product.get('thumbnail_url')
+            item['image_width'] = product.get('image_width')
+            item['image_height'] = product.get('image_height')
+
+def new_items(item_dicts: List[dict]) -> List[dict]:
+    """Give validated QuotationItemCreate dicts the id every stored item carries"""
+    for item in item_dicts:
+        item['id'] = str(uuid.uuid4())
+    return item_dicts
+
+async def next_document_number(prefix: str) -> str:
+    """Issue the next number in the per-year sequence for prefix, e.g. QT-2025-0042.
+
+    The counter document is incremented atomically, so concurrent creates on any
+    number of workers never receive the same number and deletes never cause reuse.
+    """
+    year = datetime.now().year
+    counter = await db.counters.find_one_and_update(
+        {"_id": f"{prefix}-{year}"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return f"{prefix}-{year}-{counter['seq']:04d}"
 
 async def generate_quote_number() -> str:
     """Generate unique quote number"""
-    count = await db.quotations.count_documents({})
-    return f"QT-{datetime.now().year}-{count + 1:04d}"
+    return await next_document_number("QT")
 
 @api_router.post("/quotations", response_model=Quotation)
 async def create_quotation(input: QuotationCreate, payload: dict = Depends(verify_token)):
@@ -909,18 +1195,12 @@ async def create_quotation(input: QuotationCreate, payload: dict = Depends(verif
     try:
         logger.info(f"Creating quotation for customer: {input.customer_name}, items count: {len(input.items)}")
         
-        # Process items and calculate totals
-        items = []
-        for item_data in input.items:
-            item_dict = item_data.model_dump()
-            total_amount = item_dict['offered_price'] * item_dict['quantity']
-            total_company_cost = item_dict['company_cost'] * item_dict['quantity']
-            item_dict['total_amount'] = round(total_amount, 2)
-            item_dict['total_company_cost'] = round(total_company_cost, 2)
-            items.append(QuotationItem(**item_dict))
+        # Price every line, room and the document in one pass
+        items = new_items([item_data.model_dump() for item_data in input.items])
+        await attach_item_image_metadata(items)
         
         # Calculate totals
-        totals = calculate_quotation_totals(
+        totals = quotation_totals(
             items, 
             input.overall_discount, 
             input.installation_charges, 
@@ -932,7 +1212,7 @@ async def create_quotation(input: QuotationCreate, payload: dict = Depends(verif
         
         # Create quotation object
         quotation_data = input.model_dump()
-        quotation_data['items'] = [item.model_dump() for item in items]
+        quotation_data['items'] = items
         quotation_data['quote_number'] = quote_number
         quotation_data.update(totals)
         quotation_data['created_by'] = payload.get("user_id")  # Add creator
@@ -942,10 +1222,6 @@ async def create_quotation(input: QuotationCreate, payload: dict = Depends(verif
         
         # Save to database
         doc = quotation_obj.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
-        if doc.get('sent_at'):
-            doc['sent_at'] = doc['sent_at'].isoformat()
         
         await db.quotations.insert_one(doc)
         
@@ -957,28 +1233,45 @@ async def create_quotation(input: QuotationCreate, payload: dict = Depends(verif
         logger.error(f"Error creating quotation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/quotations", response_model=List[Quotation])
-async def get_quotations(payload: dict = Depends(verify_token)):
-    """Get quotations - admin sees all, users see only their own"""
+QUOTATION_SORT_FIELDS = ("created_at", "updated_at", "total", "quote_number", "customer_name")
+
+@api_router.get("/quotations", response_model=List[QuotationSummary])
+async def get_quotations(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-created_at",
+    status: Optional[str] = None,
+    customer: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    payload: dict = Depends(verify_token)
+):
+    """List quotations newest first - admin sees all, users see only their own.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
         is_admin = await check_admin(payload)
-        user_id = payload.get("user_id")
-        
+
+        query = {}
         # Admin sees all, users see only their created ones
-        if is_admin:
-            quotations = await db.quotations.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-        else:
-            quotations = await db.quotations.find({"created_by": user_id}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-        
-        for quotation in quotations:
-            if isinstance(quotation['created_at'], str):
-                quotation['created_at'] = datetime.fromisoformat(quotation['created_at'])
-            if isinstance(quotation['updated_at'], str):
-                quotation['updated_at'] = datetime.fromisoformat(quotation['updated_at'])
-            if quotation.get('sent_at') and isinstance(quotation['sent_at'], str):
-                quotation['sent_at'] = datetime.fromisoformat(quotation['sent_at'])
-        
-        return quotations
+        if not is_admin:
+            query["created_by"] = payload.get("user_id")
+        if status:
+            query["status"] = status
+        if customer:
+            pattern = {"$regex": re.escape(customer), "$options": "i"}
+            query["$or"] = [{"customer_name": pattern}, {"customer_email": pattern}, {"quote_number": pattern}]
+        if created_from or created_to:
+            query["created_at"] = {}
+            if created_from:
+                query["created_at"]["$gte"] = datetime_bound(created_from)
+            if created_to:
+                query["created_at"]["$lt"] = datetime_bound(created_to)
+
+        return await paginate(db.quotations, query, QuotationSummary, sort=sort, sortable=QUOTATION_SORT_FIELDS, limit=limit, cursor=cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching quotations: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -991,13 +1284,6 @@ async def get_quotation(quotation_id: str, payload: dict = Depends(verify_token)
         if not quotation:
             raise HTTPException(status_code=404, detail="Quotation not found")
         
-        if isinstance(quotation['created_at'], str):
-            quotation['created_at'] = datetime.fromisoformat(quotation['created_at'])
-        if isinstance(quotation['updated_at'], str):
-            quotation['updated_at'] = datetime.fromisoformat(quotation['updated_at'])
-        if quotation.get('sent_at') and isinstance(quotation['sent_at'], str):
-            quotation['sent_at'] = datetime.fromisoformat(quotation['sent_at'])
-        
         return Quotation(**quotation)
     except HTTPException:
         raise
@@ -1005,6 +1291,27 @@ async def get_quotation(quotation_id: str, payload: dict = Depends(verify_token)
         logger.error(f"Error fetching quotation: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/quotations/{quotation_id}/summary", response_model=QuotationTotals)
+async def get_quotation_summary(quotation_id: str, payload: dict = Depends(verify_token)):
+    """Get a quotation's totals and room breakdown without its items (admin only)"""
+    try:
+        quotation = await db.quotations.find_one({"id": quotation_id}, {"_id": 0, "items": 0})
+        if not quotation:
+            raise HTTPException(status_code=404, detail="Quotation not found")
+        
+        if 'rooms' not in quotation:
+            # Saved before room totals were stored and not yet backfilled
+            stored = await db.quotations.find_one({"id": quotation_id}, {"_id": 0, "items": 1})
+            quotation['rooms'] = room_breakdown(stored.get('items') or [])
+        quotation['item_count'] = sum(room['item_count'] for room in quotation['rooms'])
+        
+        return QuotationTotals(**quotation)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching quotation summary: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @api_router.patch("/quotations/{quotation_id}", response_model=Quotation)
 async def update_quotation(quotation_id: str, update: QuotationUpdate, payload: dict = Depends(verify_token)):
     """Update a quotation (admin only)"""
@@ -1015,13 +1322,8 @@ async def update_quotation(quotation_id: str, update: QuotationUpdate, payload:
         
         # If items are updated, recalculate totals
         if 'items' in update_data:
-            items = []
-            for item_data in update_data['items']:
-                total_amount = item_data['offered_price'] * item_data['quantity']
-                total_company_cost = item_data['company_cost'] * item_data['quantity']
-                item_data['total_amount'] = round(total_amount, 2)
-                item_data['total_company_cost'] = round(total_company_cost, 2)
-                items.append(QuotationItem(**item_data))
+            items = new_items(update_data['items'])
+            await attach_item_image_metadata(items)
             
             # Get existing quotation for discount and charges
             existing = await db.quotations.find_one({"id": quotation_id}, {"_id": 0})
@@ -1032,11 +1334,10 @@ async def update_quotation(quotation_id: str, update: QuotationUpdate, payload:
             installation_charges = update_data.get('installation_charges', existing.get('installation_charges', 0))
             gst_percentage = update_data.get('gst_percentage', existing.get('gst_percentage', 18))
             
-            totals = calculate_quotation_totals(items, overall_discount, installation_charges, gst_percentage)
-            update_data['items'] = [item.model_dump() for item in items]
+            totals = quotation_totals(items, overall_discount, installation_charges, gst_percentage)
             update_data.update(totals)
         
-        update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+        update_data['updated_at'] = datetime.now(timezone.utc)
         
         result = await db.quotations.update_one(
             {"id": quotation_id},
@@ -1046,13 +1347,9 @@ async def update_quotation(quotation_id: str, update: QuotationUpdate, payload:
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Quotation not found")
         
+        pdf_cache.invalidate("quotation", quotation_id)
+        
         quotation = await db.quotations.find_one({"id": quotation_id}, {"_id": 0})
-        if isinstance(quotation['created_at'], str):
-            quotation['created_at'] = datetime.fromisoformat(quotation['created_at'])
-        if isinstance(quotation['updated_at'], str):
-            quotation['updated_at'] = datetime.fromisoformat(quotation['updated_at'])
-        if quotation.get('sent_at') and isinstance(quotation.get('sent_at')):
-            quotation['sent_at'] = datetime.fromisoformat(quotation['sent_at'])
         
         return Quotation(**quotation)
     except HTTPException:
@@ -1068,6 +1365,7 @@ async def delete_quotation(quotation_id: str, payload: dict = Depends(verify_tok
         result = await db.quotations.delete_one({"id": quotation_id})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Quotation not found")
+        pdf_cache.invalidate("quotation", quotation_id)
         return {"message": "Quotation deleted successfully"}
     except HTTPException:
         raise
@@ -1075,45 +1373,183 @@ async def delete_quotation(quotation_id: str, payload: dict = Depends(verify_tok
         logger.error(f"Error deleting quotation: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# ============= QUOTATION ITEM ENDPOINTS =============
+
+# Just the line fields needed to re-aggregate totals, so item edits never load whole items
+QUOTATION_LINE_PROJECTION = {
+    "_id": 0, "id": 1, "quote_number": 1, "customer_name": 1, "updated_at": 1,
+    "overall_discount": 1, "installation_charges": 1, "gst_percentage": 1,
+    "items.id": 1, "items.room_area": 1, "items.product_id": 1, "items.image_url": 1,
+    "items.quantity": 1, "items.offered_price": 1, "items.company_cost": 1,
+    "items.total_amount": 1, "items.total_company_cost": 1
+}
+
+async def load_quotation_lines(quotation_id: str) -> dict:
+    quotation = await db.quotations.find_one({"id": quotation_id}, QUOTATION_LINE_PROJECTION)
+    if not quotation:
+        raise HTTPException(status_code=404, detail="Quotation not found")
+    quotation.setdefault('items', [])
+    return quotation
+
+def find_item_position(quotation: dict, item_id: str) -> int:
+    for position, line in enumerate(quotation['items']):
+        if line['id'] == item_id:
+            return position
+    raise HTTPException(status_code=404, detail="Item not found")
+
+async def save_item_change(quotation: dict, lines: List[dict], update, item_id: Optional[str] = None) -> QuotationTotals:
+    """Write an item-level update along with totals re-aggregated from the priced lines.
+
+    The write only applies if the quotation is unchanged since it was read, so a
+    concurrent edit gets a 409 instead of leaving stale totals behind.
+    """
+    totals = quotation_totals(
+        lines,
+        quotation.get('overall_discount', 0),
+        quotation.get('installation_charges', 0),
+        quotation.get('gst_percentage', 18),
+        priced=True
+    )
+    fields = {**totals, "updated_at": datetime.now(timezone.utc)}
+    if isinstance(update, list):
+        update = update + [{"$set": {key: {"$literal": value} for key, value in fields.items()}}]
+    else:
+        update.setdefault("$set", {}).update(fields)
+    
+    query = {"id": quotation['id'], "updated_at": quotation.get('updated_at')}
+    if item_id:
+        query["items.id"] = item_id
+    result = await db.quotations.update_one(query, update)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Quotation was changed by another request, please retry")
+    
+    pdf_cache.invalidate("quotation", quotation['id'])
+    return QuotationTotals(**{**quotation, **totals, "item_count": len(lines)})
+
+@api_router.post("/quotations/{quotation_id}/items", response_model=QuotationItemResult)
+async def add_quotation_item(
+    quotation_id: str,
+    item: QuotationItemCreate,
+    position: Optional[int] = Query(None, ge=0),
+    payload: dict = Depends(verify_token)
+):
+    """Add a line item, appended or inserted at position (admin only)"""
+    try:
+        quotation = await load_quotation_lines(quotation_id)
+        lines = quotation['items']
+        position = len(lines) if position is None else min(position, len(lines))
+        
+        new_item = new_items([item.model_dump()])[0]
+        await attach_item_image_metadata([new_item])
+        price_items([new_item])
+        lines.insert(position, new_item)
+        
+        summary = await save_item_change(
+            quotation, lines, {"$push": {"items": {"$each": [new_item], "$position": position}}}
+        )
+        return QuotationItemResult(item=new_item, summary=summary)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error adding quotation item: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.patch("/quotations/{quotation_id}/items/{item_id}", response_model=QuotationItemResult)
+async def update_quotation_item(quotation_id: str, item_id: str, update: QuotationItemUpdate, payload: dict = Depends(verify_token)):
+    """Update one line item in place (admin only)"""
+    try:
+        changes = {k: v for k, v in update.model_dump().items() if v is not None}
+        if not changes:
+            raise HTTPException(status_code=400, detail="No fields to update")
+        
+        quotation = await load_quotation_lines(quotation_id)
+        line = quotation['items'][find_item_position(quotation, item_id)]
+        
+        if 'image_url' in changes or 'product_id' in changes:
+            # A new image needs the thumbnail metadata of the product it came from
+            image = {
+                'product_id': changes.get('product_id', line.get('product_id')),
+                'image_url': changes.get('image_url', line.get('image_url')),
+                'thumbnail_url': None,
+                'image_width': None,
+                'image_height': None
+            }
+            await attach_item_image_metadata([image])
+            changes.update(image)
+        
+        line.update(changes)
+        price_items([line])
+        changes['total_amount'] = line['total_amount']
+        changes['total_company_cost'] = line['total_company_cost']
+        
+        summary = await save_item_change(
+            quotation, quotation['items'], {"$set": {f"items.$.{k}": v for k, v in changes.items()}}, item_id=item_id
+        )
+        
+        stored = await db.quotations.find_one({"id": quotation_id}, {"_id": 0, "items": {"$elemMatch": {"id": item_id}}})
+        return QuotationItemResult(item=stored['items'][0], summary=summary)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating quotation item: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.delete("/quotations/{quotation_id}/items/{item_id}", response_model=QuotationItemResult)
+async def delete_quotation_item(quotation_id: str, item_id: str, payload: dict = Depends(verify_token)):
+    """Remove one line item (admin only)"""
+    try:
+        quotation = await load_quotation_lines(quotation_id)
+        lines = quotation['items']
+        lines.pop(find_item_position(quotation, item_id))
+        
+        summary = await save_item_change(quotation, lines, {"$pull": {"items": {"id": item_id}}}, item_id=item_id)
+        return QuotationItemResult(summary=summary)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting quotation item: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.post("/quotations/{quotation_id}/items/{item_id}/move", response_model=QuotationItemResult)
+async def move_quotation_item(quotation_id: str, item_id: str, move: QuotationItemMove, payload: dict = Depends(verify_token)):
+    """Move one line item to a new position (admin only)"""
+    try:
+        quotation = await load_quotation_lines(quotation_id)
+        lines = quotation['items']
+        order = list(range(len(lines)))
+        order.insert(min(move.position, len(lines) - 1), order.pop(find_item_position(quotation, item_id)))
+        
+        # Rebuild the array server-side from old positions, so no item content is sent
+        reorder = [{"$set": {"items": {"$map": {
+            "input": {"$literal": order},
+            "in": {"$arrayElemAt": ["$items", "$$this"]}
+        }}}}]
+        summary = await save_item_change(quotation, [lines[i] for i in order], reorder, item_id=item_id)
+        return QuotationItemResult(summary=summary)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error moving quotation item: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # ============= INVOICE ENDPOINTS =============
 
+INVOICE_SORT_FIELDS = ("created_at", "invoice_date", "total", "amount_due", "invoice_number", "customer_name")
+
 async def generate_invoice_number() -> str:
     """Generate unique invoice number"""
-    count = await db.invoices.count_documents({})
-    return f"INV-{datetime.now().year}-{count + 1:04d}"
-
-def calculate_invoice_totals(items: List[QuotationItem], discount: float, 
-                             installation_charges: float, gst_percentage: float) -> Dict[str, float]:
-    """Helper function to calculate invoice totals"""
-    subtotal = sum(item.total_amount for item in items)
-    net_amount = subtotal - discount
-    total_before_gst = net_amount + installation_charges
-    gst_amount = (total_before_gst * gst_percentage) / 100
-    total = total_before_gst + gst_amount
-    
-    return {
-        "subtotal": round(subtotal, 2),
-        "net_amount": round(net_amount, 2),
-        "gst_amount": round(gst_amount, 2),
-        "total": round(total, 2)
-    }
+    return await next_document_number("INV")
 
 @api_router.post("/invoices", response_model=Invoice)
 async def create_invoice(input: InvoiceCreate, payload: dict = Depends(verify_token)):
     """Create a new invoice (admin only)"""
     try:
-        # Process items and calculate totals
-        items = []
-        for item_data in input.items:
-            item_dict = item_data.model_dump()
-            total_amount = item_dict['offered_price'] * item_dict['quantity']
-            total_company_cost = item_dict['company_cost'] * item_dict['quantity']
-            item_dict['total_amount'] = round(total_amount, 2)
-            item_dict['total_company_cost'] = round(total_company_cost, 2)
-            items.append(QuotationItem(**item_dict))
+        # Price every line, room and the document in one pass
+        items = new_items([item_data.model_dump() for item_data in input.items])
+        await attach_item_image_metadata(items)
         
         # Calculate totals
-        totals = calculate_invoice_totals(
+        totals = invoice_totals(
             items, 
             input.discount, 
             input.installation_charges, 
@@ -1128,7 +1564,7 @@ async def create_invoice(input: InvoiceCreate, payload: dict = Depends(verify_to
         
         # Create invoice object
         invoice_data = input.model_dump()
-        invoice_data['items'] = [item.model_dump() for item in items]
+        invoice_data['items'] = items
         invoice_data['invoice_number'] = invoice_number
         invoice_data['due_date'] = due_date
         invoice_data['amount_due'] = totals['total']
@@ -1138,13 +1574,10 @@ async def create_invoice(input: InvoiceCreate, payload: dict = Depends(verify_to
         
         # Save to database
         doc = invoice_obj.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
+        # BSON has no date-only type, so calendar dates stay ISO strings
         doc['invoice_date'] = doc['invoice_date'].isoformat()
         if doc.get('due_date'):
             doc['due_date'] = doc['due_date'].isoformat()
-        if doc.get('sent_at'):
-            doc['sent_at'] = doc['sent_at'].isoformat()
         
         await db.invoices.insert_one(doc)
         return invoice_obj
@@ -1152,25 +1585,37 @@ async def create_invoice(input: InvoiceCreate, payload: dict = Depends(verify_to
         logger.error(f"Error creating invoice: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/invoices", response_model=List[Invoice])
-async def get_invoices(payload: dict = Depends(verify_token)):
-    """Get all invoices (admin only)"""
+@api_router.get("/invoices", response_model=List[InvoiceSummary])
+async def get_invoices(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-created_at",
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    customer: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    payload: dict = Depends(verify_token)
+):
+    """List invoices, newest first (admin only)"""
     try:
-        invoices = await db.invoices.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-        
-        for invoice in invoices:
-            if isinstance(invoice['created_at'], str):
-                invoice['created_at'] = datetime.fromisoformat(invoice['created_at'])
-            if isinstance(invoice['updated_at'], str):
-                invoice['updated_at'] = datetime.fromisoformat(invoice['updated_at'])
-            if isinstance(invoice.get('invoice_date'), str):
-                invoice['invoice_date'] = date.fromisoformat(invoice['invoice_date'])
-            if invoice.get('due_date') and isinstance(invoice['due_date'], str):
-                invoice['due_date'] = date.fromisoformat(invoice['due_date'])
-            if invoice.get('sent_at') and isinstance(invoice['sent_at'], str):
-                invoice['sent_at'] = datetime.fromisoformat(invoice['sent_at'])
-        
-        return invoices
+        query = {}
+        if status:
+            query["status"] = status
+        if payment_status:
+            query["payment_status"] = payment_status
+        if customer:
+            pattern = {"$regex": re.escape(customer), "$options": "i"}
+            query["$or"] = [{"customer_name": pattern}, {"customer_email": pattern}, {"invoice_number": pattern}]
+        if created_from or created_to:
+            query["created_at"] = {}
+            if created_from:
+                query["created_at"]["$gte"] = datetime_bound(created_from)
+            if created_to:
+                query["created_at"]["$lt"] = datetime_bound(created_to)
+        return await paginate(db.invoices, query, InvoiceSummary, sort=sort, sortable=INVOICE_SORT_FIELDS, limit=limit, cursor=cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching invoices: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1183,17 +1628,6 @@ async def get_invoice(invoice_id: str, payload: dict = Depends(verify_token)):
         if not invoice:
             raise HTTPException(status_code=404, detail="Invoice not found")
         
-        if isinstance(invoice['created_at'], str):
-            invoice['created_at'] = datetime.fromisoformat(invoice['created_at'])
-        if isinstance(invoice['updated_at'], str):
-            invoice['updated_at'] = datetime.fromisoformat(invoice['updated_at'])
-        if isinstance(invoice.get('invoice_date'), str):
-            invoice['invoice_date'] = date.fromisoformat(invoice['invoice_date'])
-        if invoice.get('due_date') and isinstance(invoice['due_date'], str):
-            invoice['due_date'] = date.fromisoformat(invoice['due_date'])
-        if invoice.get('sent_at') and isinstance(invoice['sent_at'], str):
-            invoice['sent_at'] = datetime.fromisoformat(invoice['sent_at'])
-        
         return Invoice(**invoice)
     except HTTPException:
         raise
@@ -1216,20 +1650,14 @@ async def update_invoice(invoice_id: str, update: InvoiceUpdate, payload: dict =
         
         # If items are updated, recalculate totals
         if 'items' in update_data:
-            items = []
-            for item_data in update_data['items']:
-                total_amount = item_data['offered_price'] * item_data['quantity']
-                total_company_cost = item_data['company_cost'] * item_data['quantity']
-                item_data['total_amount'] = round(total_amount, 2)
-                item_data['total_company_cost'] = round(total_company_cost, 2)
-                items.append(QuotationItem(**item_data))
+            items = new_items(update_data['items'])
+            await attach_item_image_metadata(items)
             
             discount = update_data.get('discount', existing.get('discount', 0))
             installation_charges = update_data.get('installation_charges', existing.get('installation_charges', 0))
             gst_percentage = update_data.get('gst_percentage', existing.get('gst_percentage', 18))
             
-            totals = calculate_invoice_totals(items, discount, installation_charges, gst_percentage)
-            update_data['items'] = [item.model_dump() for item in items]
+            totals = invoice_totals(items, discount, installation_charges, gst_percentage)
             update_data.update(totals)
         
         # Update amount_due if amount_paid changed
@@ -1246,7 +1674,7 @@ async def update_invoice(invoice_id: str, update: InvoiceUpdate, payload: dict =
             else:
                 update_data['payment_status'] = 'pending'
         
-        update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+        update_data['updated_at'] = datetime.now(timezone.utc)
         
         result = await db.invoices.update_one(
             {"id": invoice_id},
@@ -1256,17 +1684,9 @@ async def update_invoice(invoice_id: str, update: InvoiceUpdate, payload: dict =
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Invoice not found")
         
+        pdf_cache.invalidate("invoice", invoice_id)
+        
         invoice = await db.invoices.find_one({"id": invoice_id}, {"_id": 0})
-        if isinstance(invoice['created_at'], str):
-            invoice['created_at'] = datetime.fromisoformat(invoice['created_at'])
-        if isinstance(invoice['updated_at'], str):
-            invoice['updated_at'] = datetime.fromisoformat(invoice['updated_at'])
-        if isinstance(invoice.get('invoice_date'), str):
-            invoice['invoice_date'] = date.fromisoformat(invoice['invoice_date'])
-        if invoice.get('due_date') and isinstance(invoice['due_date'], str):
-            invoice['due_date'] = date.fromisoformat(invoice['due_date'])
-        if invoice.get('sent_at') and isinstance(invoice.get('sent_at')):
-            invoice['sent_at'] = datetime.fromisoformat(invoice['sent_at'])
         
         return Invoice(**invoice)
     except HTTPException:
@@ -1282,6 +1702,7 @@ async def delete_invoice(invoice_id: str, payload: dict = Depends(verify_token))
         result = await db.invoices.delete_one({"id": invoice_id})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Invoice not found")
+        pdf_cache.invalidate("invoice", invoice_id)
         return {"message": "Invoice deleted successfully"}
     except HTTPException:
         raise
@@ -1295,13 +1716,7 @@ async def delete_invoice(invoice_id: str, payload: dict = Depends(verify_token))
 async def get_settings(payload: dict = Depends(verify_token)):
     """Get company settings (admin only)"""
     try:
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            # Initialize with default settings
-            default_settings = Settings()
-            await db.settings.insert_one(default_settings.model_dump())
-            return default_settings
-        return Settings(**settings)
+        return Settings(**await settings_cache.get())
     except Exception as e:
         logger.error(f"Error fetching settings: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1310,23 +1725,198 @@ async def get_settings(payload: dict = Depends(verify_token)):
 async def update_settings(settings: Settings, payload: dict = Depends(verify_token)):
     """Update company settings (admin only)"""
     try:
-        settings_dict = settings.model_dump()
-        settings_dict['id'] = "company_settings"
+        saved = await settings_cache.save(settings.model_dump())
         
-        await db.settings.update_one(
-            {"id": "company_settings"},
-            {"$set": settings_dict},
-            upsert=True
-        )
+        # Every cached PDF embeds company settings
+        pdf_cache.clear()
         
-        return settings
+        return Settings(**saved)
     except Exception as e:
         logger.error(f"Error updating settings: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.post("/settings/cover-image")
+async def upload_cover_image(file: UploadFile = File(...), payload: dict = Depends(verify_token)):
+    """Upload the quotation cover page image (admin only)"""
+    try:
+        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
+        if file.content_type not in allowed_types:
+            raise HTTPException(status_code=400, detail="Only JPEG, PNG, and WEBP images are allowed")
+        
+        file_content = await file.read()
+        
+        # Validate file size (10MB limit)
+        max_size = 10 * 1024 * 1024
+        if len(file_content) > max_size:
+            raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+        
+        # Downscale once to the cover image box; renderers pick up the new file on their next cover page
+        await asyncio.to_thread(prepare_cover_image, file_content, COVER_IMAGE_PATH)
+        pdf_cache.clear()
+        
+        return {"message": "Cover image uploaded successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading cover image: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to upload cover image: {str(e)}")
+
 # ============= PDF GENERATION ENDPOINTS =============
 
-from fastapi.responses import FileResponse
+async def render_pdf(render, document: dict, settings: dict, output_path: Optional[str] = None):
+    """Run a render on the PDF process pool, mapping pool back-pressure to HTTP errors.
+
+    Returns output_path, or the PDF bytes when rendering in memory.
+    """
+    try:
+        return await render(document, settings, output_path)
+    except RenderQueueFull:
+        raise HTTPException(status_code=503, detail="PDF renderer is busy, please retry shortly")
+    except RenderTimeout:
+        raise HTTPException(status_code=504, detail="PDF rendering timed out")
+
+async def get_cached_pdf(kind: str, document: dict, settings: dict):
+    """Return (PDF, cache key), rendering only when the inputs changed.
+
+    The PDF is the cached file's path on a hit. On a miss it is rendered in
+    memory and the bytes are returned directly, while a copy is written to the
+    cache with an atomic rename.
+    """
+    key = await asyncio.to_thread(pdf_cache.cache_key, kind, document, settings)
+    cached_path = pdf_cache.get(kind, document['id'], key)
+    if cached_path:
+        return cached_path, key
+    
+    render = pdf_render_service.render_quotation if kind == "quotation" else pdf_render_service.render_invoice
+    pdf_bytes = await render_pdf(render, document, settings)
+    try:
+        await asyncio.to_thread(pdf_cache.store_bytes, kind, document['id'], key, pdf_bytes)
+    except OSError as e:
+        logger.warning(f"Could not cache {kind} PDF {document['id']}: {str(e)}")
+    return pdf_bytes, key
+
+def pdf_response(pdf, filename: str, etag: str) -> Response:
+    """Send a cached PDF file or freshly rendered PDF bytes as an attachment"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if isinstance(pdf, bytes):
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return Response(content=pdf, media_type='application/pdf', headers=headers)
+    return FileResponse(path=str(pdf), media_type='application/pdf', filename=filename, headers=headers)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check an If-None-Match header against a quoted ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def export_pdf_entries(kind: str, query: dict, settings: dict):
+    """Yield (filename, PDF bytes) for every matching document as its PDF becomes ready.
+
+    Renders run on the process pool, at most one per worker at a time, and
+    cached PDFs are reused. Documents that fail to render are listed in a
+    final errors.txt entry instead of aborting the archive.
+    """
+    collection, number_field = (db.quotations, "quote_number") if kind == "quotation" else (db.invoices, "invoice_number")
+    
+    async def render(document):
+        try:
+            pdf, _ = await get_cached_pdf(kind, document, settings)
+            if isinstance(pdf, Path):
+                # Read now: an edit or cache clear may delete the file before the archive reaches it
+                pdf = await asyncio.to_thread(pdf.read_bytes)
+            return document, pdf, None
+        except HTTPException as e:
+            return document, None, e.detail
+        except Exception as e:
+            return document, None, str(e)
+    
+    pending = set()
+    names = set()
+    failures = []
+    
+    def finished(tasks):
+        for task in tasks:
+            document, pdf, error = task.result()
+            number = document[number_field].replace('/', '_')
+            if error:
+                failures.append(f"{number}: {error}")
+                continue
+            name = f"{kind}_{number}.pdf"
+            if name in names:
+                name = f"{kind}_{number}_{document['id']}.pdf"
+            names.add(name)
+            yield name, pdf
+    
+    try:
+        async for document in collection.find(query, {"_id": 0}).sort("created_at", 1):
+            pending.add(asyncio.create_task(render(document)))
+            if len(pending) >= pdf_render_service.max_workers:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for entry in finished(done):
+                    yield entry
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for entry in finished(done):
+                yield entry
+    finally:
+        # The client went away mid-download
+        for task in pending:
+            task.cancel()
+    
+    if failures:
+        yield "errors.txt", ("\n".join(failures) + "\n").encode('utf-8')
+
+async def export_pdfs(kind: str, export: PDFExportRequest, payload: dict):
+    is_admin = await check_admin(payload)
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    query = {}
+    if export.ids:
+        query["id"] = {"$in": export.ids}
+    if export.status:
+        query["status"] = export.status
+    if export.created_from or export.created_to:
+        query["created_at"] = {}
+        if export.created_from:
+            query["created_at"]["$gte"] = datetime_bound(export.created_from)
+        if export.created_to:
+            query["created_at"]["$lt"] = datetime_bound(export.created_to)
+    if not query:
+        raise HTTPException(status_code=400, detail="Provide ids, status or a date range to export")
+    
+    settings = await settings_cache.get()
+    
+    filename = f"{kind}s_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        zip_stream(export_pdf_entries(kind, query, settings)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.post("/quotations/export")
+async def export_quotation_pdfs(export: PDFExportRequest, payload: dict = Depends(verify_token)):
+    """Download the PDFs of matching quotations as a ZIP (admin only)"""
+    try:
+        return await export_pdfs("quotation", export, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting quotation PDFs: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.post("/invoices/export")
+async def export_invoice_pdfs(export: PDFExportRequest, payload: dict = Depends(verify_token)):
+    """Download the PDFs of matching invoices as a ZIP (admin only)"""
+    try:
+        return await export_pdfs("invoice", export, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting invoice PDFs: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @api_router.post("/quotations/{quotation_id}/generate-pdf")
 async def generate_quotation_pdf(quotation_id: str, payload: dict = Depends(verify_token)):
@@ -1338,15 +1928,15 @@ async def generate_quotation_pdf(quotation_id: str, payload: dict = Depends(veri
             raise HTTPException(status_code=404, detail="Quotation not found")
         
         # Get settings
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            settings = Settings().model_dump()
+        settings = await settings_cache.get()
         
         # Generate PDF
         pdf_filename = f"quotation_{quotation['quote_number'].replace('/', '_')}.pdf"
         pdf_path = PDF_DIR / pdf_filename
         
-        pdf_generator.generate_quotation_pdf(quotation, settings, str(pdf_path))
+        # Render in memory and publish with a rename so concurrent requests never see a torn file
+        pdf_bytes = await render_pdf(pdf_render_service.render_quotation, quotation, settings)
+        await asyncio.to_thread(write_atomic, pdf_path, pdf_bytes)
         
         return {
             "message": "PDF generated successfully",
@@ -1360,7 +1950,7 @@ async def generate_quotation_pdf(quotation_id: str, payload: dict = Depends(veri
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/quotations/{quotation_id}/download-pdf")
-async def download_quotation_pdf(quotation_id: str, payload: dict = Depends(verify_token)):
+async def download_quotation_pdf(quotation_id: str, request: Request, payload: dict = Depends(verify_token)):
     """Download PDF for a quotation (admin only)"""
     try:
         # Get quotation
@@ -1369,22 +1959,17 @@ async def download_quotation_pdf(quotation_id: str, payload: dict = Depends(veri
             raise HTTPException(status_code=404, detail="Quotation not found")
         
         # Get settings
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            settings = Settings().model_dump()
+        settings = await settings_cache.get()
         
-        # Generate PDF
+        # Serve the cached render when neither the quotation nor the settings changed
         pdf_filename = f"quotation_{quotation['quote_number'].replace('/', '_')}.pdf"
-        pdf_path = PDF_DIR / pdf_filename
+        pdf, cache_key = await get_cached_pdf("quotation", quotation, settings)
         
-        # Always regenerate PDF to ensure latest data
-        pdf_generator.generate_quotation_pdf(quotation, settings, str(pdf_path))
+        etag = f'"{cache_key}"'
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return FileResponse(
-            path=str(pdf_path),
-            media_type='application/pdf',
-            filename=pdf_filename
-        )
+        return pdf_response(pdf, pdf_filename, etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -1401,15 +1986,15 @@ async def generate_invoice_pdf(invoice_id: str, payload: dict = Depends(verify_t
             raise HTTPException(status_code=404, detail="Invoice not found")
         
         # Get settings
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            settings = Settings().model_dump()
+        settings = await settings_cache.get()
         
         # Generate PDF
         pdf_filename = f"invoice_{invoice['invoice_number'].replace('/', '_')}.pdf"
         pdf_path = PDF_DIR / pdf_filename
         
-        pdf_generator.generate_invoice_pdf(invoice, settings, str(pdf_path))
+        # Render in memory and publish with a rename so concurrent requests never see a torn file
+        pdf_bytes = await render_pdf(pdf_render_service.render_invoice, invoice, settings)
+        await asyncio.to_thread(write_atomic, pdf_path, pdf_bytes)
         
         return {
             "message": "PDF generated successfully",
@@ -1423,7 +2008,7 @@ async def generate_invoice_pdf(invoice_id: str, payload: dict = Depends(verify_t
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/invoices/{invoice_id}/download-pdf")
-async def download_invoice_pdf(invoice_id: str, payload: dict = Depends(verify_token)):
+async def download_invoice_pdf(invoice_id: str, request: Request, payload: dict = Depends(verify_token)):
     """Download PDF for an invoice (admin only)"""
     try:
         # Get invoice
@@ -1432,22 +2017,17 @@ async def download_invoice_pdf(invoice_id: str, payload: dict = Depends(verify_t
             raise HTTPException(status_code=404, detail="Invoice not found")
         
         # Get settings
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            settings = Settings().model_dump()
+        settings = await settings_cache.get()
         
-        # Generate PDF
+        # Serve the cached render when neither the invoice nor the settings changed
         pdf_filename = f"invoice_{invoice['invoice_number'].replace('/', '_')}.pdf"
-        pdf_path = PDF_DIR / pdf_filename
+        pdf, cache_key = await get_cached_pdf("invoice", invoice, settings)
         
-        # Always regenerate PDF to ensure latest data
-        pdf_generator.generate_invoice_pdf(invoice, settings, str(pdf_path))
+        etag = f'"{cache_key}"'
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return FileResponse(
-            path=str(pdf_path),
-            media_type='application/pdf',
-            filename=pdf_filename
-        )
+        return pdf_response(pdf, pdf_filename, etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -1456,7 +2036,7 @@ async def download_invoice_pdf(invoice_id: str, payload: dict = Depends(verify_t
 
 # ============= EMAIL SENDING ENDPOINTS =============
 
-async def send_quotation_email(quotation_data: dict, pdf_path: str, settings_data: dict):
+async def send_quotation_email(quotation_data: dict, pdf_bytes: bytes, pdf_filename: str, settings_data: dict):
     """Send quotation email with PDF attachment"""
     try:
         msg = MIMEMultipart()
@@ -1493,17 +2073,13 @@ async def send_quotation_email(quotation_data: dict, pdf_path: str, settings_dat
         msg.attach(MIMEText(html_content, 'html'))
         
         # Attach PDF
-        with open(pdf_path, 'rb') as f:
-            pdf_attachment = MIMEApplication(f.read(), _subtype='pdf')
-            pdf_attachment.add_header('Content-Disposition', 'attachment', 
-                                     filename=Path(pdf_path).name)
-            msg.attach(pdf_attachment)
+        pdf_attachment = MIMEApplication(pdf_bytes, _subtype='pdf')
+        pdf_attachment.add_header('Content-Disposition', 'attachment', 
+                                 filename=pdf_filename)
+        msg.attach(pdf_attachment)
         
         # Send email
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
+        await mail_transport.send(msg)
         
         logger.info(f"Quotation email sent to {quotation_data['customer_email']}")
         return True
@@ -1511,7 +2087,7 @@ async def send_quotation_email(quotation_data: dict, pdf_path: str, settings_dat
         logger.error(f"Failed to send quotation email: {str(e)}")
         raise Exception(f"Email sending failed: {str(e)}")
 
-async def send_invoice_email(invoice_data: dict, pdf_path: str, settings_data: dict):
+async def send_invoice_email(invoice_data: dict, pdf_bytes: bytes, pdf_filename: str, settings_data: dict):
     """Send invoice email with PDF attachment"""
     try:
         msg = MIMEMultipart()
@@ -1550,17 +2126,13 @@ async def send_invoice_email(invoice_data: dict, pdf_path: str, settings_data: d
         msg.attach(MIMEText(html_content, 'html'))
         
         # Attach PDF
-        with open(pdf_path, 'rb') as f:
-            pdf_attachment = MIMEApplication(f.read(), _subtype='pdf')
-            pdf_attachment.add_header('Content-Disposition', 'attachment', 
-                                     filename=Path(pdf_path).name)
-            msg.attach(pdf_attachment)
+        pdf_attachment = MIMEApplication(pdf_bytes, _subtype='pdf')
+        pdf_attachment.add_header('Content-Disposition', 'attachment', 
+                                 filename=pdf_filename)
+        msg.attach(pdf_attachment)
         
         # Send email
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
+        await mail_transport.send(msg)
         
         logger.info(f"Invoice email sent to {invoice_data['customer_email']}")
         return True
@@ -1568,116 +2140,122 @@ async def send_invoice_email(invoice_data: dict, pdf_path: str, settings_data: d
         logger.error(f"Failed to send invoice email: {str(e)}")
         raise Exception(f"Email sending failed: {str(e)}")
 
-@api_router.post("/quotations/{quotation_id}/send-email")
+@email_outbox.handler("contact_notification")
+async def deliver_contact_notification(job: dict):
+    contact = await db.contact_submissions.find_one({"id": job["payload"]["contact_id"]}, {"_id": 0})
+    if not contact:
+        raise Exception("Contact submission not found")
+    # The job may run long after the form was sent; jobs queued before submitted_at was stored use the contact's timestamp
+    submitted_at = job["payload"].get("submitted_at") or contact["timestamp"]
+    if not await send_email_notification(contact, submitted_at):
+        raise Exception("Email notification failed")
+
+@email_outbox.handler("quotation")
+async def deliver_quotation_email(job: dict):
+    """Render the quotation PDF, email it and mark the quotation as sent"""
+    quotation_id = job["payload"]["quotation_id"]
+    quotation = await db.quotations.find_one({"id": quotation_id}, {"_id": 0})
+    if not quotation:
+        raise Exception("Quotation not found")
+    
+    settings = await settings_cache.get()
+    
+    pdf_filename = f"quotation_{quotation['quote_number'].replace('/', '_')}.pdf"
+    pdf, _ = await get_cached_pdf("quotation", quotation, settings)
+    if not isinstance(pdf, bytes):
+        pdf = await asyncio.to_thread(pdf.read_bytes)
+    
+    await send_quotation_email(quotation, pdf, pdf_filename, settings)
+    
+    await db.quotations.update_one(
+        {"id": quotation_id},
+        {"$set": {
+            "status": "sent",
+            "sent_at": datetime.now(timezone.utc)
+        }}
+    )
+
+@email_outbox.handler("invoice")
+async def deliver_invoice_email(job: dict):
+    """Render the invoice PDF, email it and mark the invoice as sent"""
+    invoice_id = job["payload"]["invoice_id"]
+    invoice = await db.invoices.find_one({"id": invoice_id}, {"_id": 0})
+    if not invoice:
+        raise Exception("Invoice not found")
+    
+    settings = await settings_cache.get()
+    
+    pdf_filename = f"invoice_{invoice['invoice_number'].replace('/', '_')}.pdf"
+    pdf, _ = await get_cached_pdf("invoice", invoice, settings)
+    if not isinstance(pdf, bytes):
+        pdf = await asyncio.to_thread(pdf.read_bytes)
+    
+    await send_invoice_email(invoice, pdf, pdf_filename, settings)
+    
+    await db.invoices.update_one(
+        {"id": invoice_id},
+        {"$set": {
+            "status": "sent",
+            "sent_at": datetime.now(timezone.utc)
+        }}
+    )
+
+@api_router.post("/quotations/{quotation_id}/send-email", status_code=202)
 async def send_quotation_email_endpoint(quotation_id: str, payload: dict = Depends(verify_token)):
-    """Generate PDF and send quotation via email (admin only)"""
+    """Queue the quotation for email delivery (admin only)"""
     try:
-        # Get quotation
-        quotation = await db.quotations.find_one({"id": quotation_id}, {"_id": 0})
+        quotation = await db.quotations.find_one({"id": quotation_id}, {"_id": 0, "id": 1})
         if not quotation:
             raise HTTPException(status_code=404, detail="Quotation not found")
         
-        # Get settings
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            settings = Settings().model_dump()
-        
-        # Generate PDF
-        pdf_filename = f"quotation_{quotation['quote_number'].replace('/', '_')}.pdf"
-        pdf_path = PDF_DIR / pdf_filename
-        
-        pdf_generator.generate_quotation_pdf(quotation, settings, str(pdf_path))
-        
-        # Try to send email, but don't fail if email fails
-        email_sent = False
-        email_error = None
-        try:
-            await send_quotation_email(quotation, str(pdf_path), settings)
-            email_sent = True
-        except Exception as email_ex:
-            email_error = str(email_ex)
-            logger.error(f"Email sending failed but PDF generated: {email_error}")
-        
-        # Update quotation status
-        await db.quotations.update_one(
-            {"id": quotation_id},
-            {"$set": {
-                "status": "sent",
-                "sent_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
-        
-        if email_sent:
-            return {"message": "Quotation sent successfully via email", "pdf_generated": True, "email_sent": True}
-        else:
-            return {
-                "message": f"PDF generated successfully but email failed: {email_error}. Please download PDF and send manually.",
-                "pdf_generated": True,
-                "email_sent": False,
-                "pdf_path": str(pdf_path),
-                "error": email_error
-            }
+        job = await email_outbox.enqueue("quotation", {"quotation_id": quotation_id}, payload.get("user_id"))
+        return {"message": "Quotation queued for email delivery", "job_id": job["id"], "status": job["status"]}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error sending quotation email: {str(e)}")
+        logger.error(f"Error queueing quotation email: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/invoices/{invoice_id}/send-email")
+@api_router.post("/invoices/{invoice_id}/send-email", status_code=202)
 async def send_invoice_email_endpoint(invoice_id: str, payload: dict = Depends(verify_token)):
-    """Generate PDF and send invoice via email (admin only)"""
+    """Queue the invoice for email delivery (admin only)"""
     try:
-        # Get invoice
-        invoice = await db.invoices.find_one({"id": invoice_id}, {"_id": 0})
+        invoice = await db.invoices.find_one({"id": invoice_id}, {"_id": 0, "id": 1})
         if not invoice:
             raise HTTPException(status_code=404, detail="Invoice not found")
         
-        # Get settings
-        settings = await db.settings.find_one({"id": "company_settings"}, {"_id": 0})
-        if not settings:
-            settings = Settings().model_dump()
-        
-        # Generate PDF
-        pdf_filename = f"invoice_{invoice['invoice_number'].replace('/', '_')}.pdf"
-        pdf_path = PDF_DIR / pdf_filename
-        
-        pdf_generator.generate_invoice_pdf(invoice, settings, str(pdf_path))
-        
-        # Try to send email, but don't fail if email fails
-        email_sent = False
-        email_error = None
-        try:
-            await send_invoice_email(invoice, str(pdf_path), settings)
-            email_sent = True
-        except Exception as email_ex:
-            email_error = str(email_ex)
-            logger.error(f"Email sending failed but PDF generated: {email_error}")
-        
-        # Update invoice status
-        await db.invoices.update_one(
-            {"id": invoice_id},
-            {"$set": {
-                "status": "sent",
-                "sent_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
-        
-        if email_sent:
-            return {"message": "Invoice sent successfully via email", "pdf_generated": True, "email_sent": True}
-        else:
-            return {
-                "message": f"PDF generated successfully but email failed: {email_error}. Please download PDF and send manually.",
-                "pdf_generated": True,
-                "email_sent": False,
-                "pdf_path": str(pdf_path),
-                "error": email_error
-            }
+        job = await email_outbox.enqueue("invoice", {"invoice_id": invoice_id}, payload.get("user_id"))
+        return {"message": "Invoice queued for email delivery", "job_id": job["id"], "status": job["status"]}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error sending invoice email: {str(e)}")
+        logger.error(f"Error queueing invoice email: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/email-jobs/{job_id}")
+async def get_email_job(job_id: str, payload: dict = Depends(verify_token)):
+    """Delivery progress of a queued email"""
+    try:
+        job = await email_outbox.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Email job not found")
+        return {
+            "job_id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "next_attempt_at": job["next_attempt_at"] if job["status"] == "queued" else None,
+            "last_error": job["last_error"],
+            "created_at": job["created_at"],
+            "completed_at": job["completed_at"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching email job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1701,7 +2279,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],  # Important for file downloads
+    expose_headers=["Content-Disposition", NEXT_CURSOR_HEADER],  # Important for file downloads and paging
     max_age=3600,
 )
 
@@ -1712,6 +2290,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Error creating indexes: {str(e)}")
+
+@app.on_event("startup")
+async def seed_document_counters():
+    # Databases created before the counters collection existed still hold issued numbers
+    if await db.counters.count_documents({}, limit=1) == 0:
+        await seed_counters(db)
+
+async def run_backfills():
+    try:
+        await backfill_datetimes(db)
+    except Exception as e:
+        logger.error(f"Error converting stored timestamps: {str(e)}")
+    try:
+        await backfill_room_totals(db)
+    except Exception as e:
+        logger.error(f"Error storing room totals: {str(e)}")
+
+@app.on_event("startup")
+async def start_backfills():
+    # Older documents hold ISO string timestamps and lack room totals; fix them in the background
+    app.state.backfill = asyncio.create_task(run_backfills())
+
+@app.on_event("startup")
+async def start_email_outbox():
+    email_outbox.start()
+
+@app.on_event("startup")
+async def start_settings_cache():
+    settings_cache.start()
+
+@app.on_event("startup")
+async def start_activity_log():
+    activity_log.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    app.state.backfill.cancel()
+    await email_outbox.stop()
+    await settings_cache.stop()
+    await activity_log.stop()
+    client.close()
+    pdf_render_service.shutdown()
+    password_hasher.shutdown()
+    await mail_transport.close()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""In-process cache of the company settings document.
+
+PDF renders and emails need the company settings on every request, so each
+API process keeps them in memory instead of reading Mongo each time. Every
+save increments a version stamp on the document. A background task keeps
+the cache current by following a change stream on the settings collection
+when Mongo runs as a replica set. Otherwise it polls only the version field
+every few seconds. A save in one process therefore reaches the others within
+one poll interval, and requests never wait on Mongo once the cache is loaded.
+"""
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_ID = "company_settings"
+
+
+class SettingsCache:
+    def __init__(self, collection, defaults: Callable[[], dict], poll_interval: float = 5):
+        self.collection = collection
+        self.defaults = defaults
+        self.poll_interval = poll_interval
+        self._settings: Optional[dict] = None
+        self._version = -1
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self) -> dict:
+        """The current settings; a copy, so callers may modify it"""
+        if self._settings is None:
+            async with self._lock:
+                if self._settings is None:
+                    await self.refresh()
+        return dict(self._settings)
+
+    async def refresh(self):
+        """Reload the settings from Mongo, falling back to the defaults if none are saved"""
+        document = await self.collection.find_one({"id": SETTINGS_ID}, {"_id": 0})
+        self._store(document or {**self.defaults(), "version": 0}, force=True)
+
+    async def save(self, settings: dict) -> dict:
+        """Write the settings, bump the version stamp and update this process's copy"""
+        document = await self.collection.find_one_and_update(
+            {"id": SETTINGS_ID},
+            {"$set": {**settings, "id": SETTINGS_ID}, "$inc": {"version": 1}},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._store(document)
+        return dict(self._settings)
+
+    def _store(self, document: dict, force: bool = False):
+        version = document.pop("version", 0)
+        # A change event or poll can arrive after a newer save in this process
+        if force or version >= self._version:
+            self._settings = document
+            self._version = version
+
+    async def _follow_changes(self):
+        pipeline = [{"$match": {"fullDocument.id": SETTINGS_ID}}]
+        async with self.collection.watch(pipeline, full_document="updateLookup") as stream:
+            # Saves made before the stream opened are not replayed
+            await self.refresh()
+            async for change in stream:
+                document = change.get("fullDocument")
+                if document:
+                    self._store({k: v for k, v in document.items() if k != "_id"})
+
+    async def _poll(self):
+        while True:
+            try:
+                stamp = await self.collection.find_one({"id": SETTINGS_ID}, {"_id": 0, "version": 1})
+                if (stamp or {}).get("version", 0) != self._version:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Error checking settings version: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _watch(self):
+        try:
+            await self._follow_changes()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Change streams need a replica set; standalone servers fall back to polling the version
+            logger.info(f"Settings change stream unavailable, polling every {self.poll_interval}s: {str(e)}")
+        await self._poll()
+
+    def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
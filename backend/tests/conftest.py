@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Backend modules are imported by name, as server.py does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# server.py reads these at import; the tests below never reach Mongo
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'inhaus_test')
@@ -0,0 +1,72 @@
+import asyncio
+import server
+from local_smtp import LocalSMTPServer
+from mailer import SMTPPool
+
+
+def quotation(number: str, customer_email: str = "customer@example.com") -> dict:
+    return {
+        "quote_number": number,
+        "customer_name": "Test Customer",
+        "customer_email": customer_email,
+        "total": 11800,
+        "validity_days": 15,
+        "payment_terms": "50% advance",
+    }
+
+
+async def send_quotations(smtp: LocalSMTPServer, quotations: list, monkeypatch) -> list:
+    """Send each quotation email through one pooled connection; returns the error raised for each, or None"""
+    pool = SMTPPool(smtp.host, smtp.port, starttls=False, size=1)
+    monkeypatch.setattr(server, "mail_transport", pool)
+    monkeypatch.setattr(server, "SMTP_USER", "quotes@example.com")
+    errors = []
+    try:
+        for document in quotations:
+            try:
+                await server.send_quotation_email(
+                    document, b"%PDF-1.4 test", f"Quotation_{document['quote_number']}.pdf", {"company_name": "InHaus"}
+                )
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+    finally:
+        await pool.close()
+    return errors
+
+
+def test_quotation_emails_reuse_pooled_connection(monkeypatch):
+    async def scenario():
+        async with LocalSMTPServer(port=0) as smtp:
+            errors = await send_quotations(smtp, [quotation("QT-2026-0001"), quotation("QT-2026-0002")], monkeypatch)
+            return smtp, errors
+
+    smtp, errors = asyncio.run(scenario())
+
+    assert errors == [None, None]
+    assert [message["Subject"] for message in smtp.messages] == [
+        "Quotation QT-2026-0001 from InHaus",
+        "Quotation QT-2026-0002 from InHaus",
+    ]
+    attachment = next(smtp.messages[0].iter_attachments())
+    assert attachment.get_filename() == "Quotation_QT-2026-0001.pdf"
+    assert attachment.get_content() == b"%PDF-1.4 test"
+    assert smtp.connections == 1
+
+
+def test_refused_recipient_keeps_pooled_connection(monkeypatch):
+    async def scenario():
+        async with LocalSMTPServer(port=0, refused_recipients=["bounce@example.com"]) as smtp:
+            errors = await send_quotations(
+                smtp,
+                [quotation("QT-2026-0001", "bounce@example.com"), quotation("QT-2026-0002")],
+                monkeypatch
+            )
+            return smtp, errors
+
+    smtp, errors = asyncio.run(scenario())
+
+    assert "Mailbox unavailable" in str(errors[0])
+    assert errors[1] is None
+    assert [message["Subject"] for message in smtp.messages] == ["Quotation QT-2026-0002 from InHaus"]
+    assert smtp.connections == 1
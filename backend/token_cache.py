@@ -0,0 +1,57 @@
+"""Per-process cache of verified access tokens.
+
+Tokens carry the user's role, approval status and token version as signed
+claims, so authorizing a request needs only the decoded payload. After a
+token is verified once, its payload is cached under a SHA-256 digest of the
+token for a short TTL, and later requests with the same token skip the
+signature check and the user lookup. Revoking a user's tokens (by bumping
+token_version on the user record) evicts them from this process at once.
+Other processes stop accepting them when their cached entry expires, which
+takes at most one TTL. The cache is a bounded LRU.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+
+class CachedToken(NamedTuple):
+    payload: dict
+    expires_at: float
+
+
+class TokenCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """The verified payload for token, or None if it is not cached or has expired"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return dict(entry.payload)
+
+    def put(self, token: str, payload: dict):
+        # Never outlive the token's own expiry
+        expires_at = min(time.time() + self.ttl, payload.get("exp", float("inf")))
+        key = self._key(token)
+        self._entries[key] = CachedToken(dict(payload), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def revoke_user(self, user_id: str):
+        """Drop every cached token issued to user_id"""
+        for key in [key for key, entry in self._entries.items() if entry.payload.get("user_id") == user_id]:
+            del self._entries[key]
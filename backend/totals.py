@@ -0,0 +1,137 @@
+"""Pricing engine for quotations and invoices.
+
+Line totals are computed for all items at once with NumPy in integer paise,
+rounded half-up to the decimal value the client sent, so sums are exact and do
+not drift with float addition. Room subtotals and each room's item positions
+come out of the same pass via bincount and a stable argsort, and the few
+document-level figures (discount, GST, margin) are worked out in Decimal. The
+per-room breakdown is stored on the document so the PDF and the dashboard
+never regroup or re-sum the items.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List
+
+import numpy as np
+
+CENT = Decimal('0.01')
+
+
+def _to_paise(values: np.ndarray) -> np.ndarray:
+    """Round rupee amounts half-up to whole paise"""
+    # Rounding to 6 places first absorbs float noise such as 19.995 * 100 == 1999.4999999999998
+    scaled = np.round(values * 100, 6)
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+def _rupees(paise) -> Decimal:
+    return Decimal(int(paise)) / 100
+
+
+def _money(value: Decimal) -> float:
+    return float(value.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _column(items: List[dict], field: str) -> np.ndarray:
+    return np.fromiter((item[field] for item in items), dtype=np.float64, count=len(items))
+
+
+def price_items(items: List[dict], priced: bool = False) -> dict:
+    """Set total_amount and total_company_cost on every item dict.
+
+    Returns the item-level aggregates: subtotal and total_company_cost in paise
+    and the per-room breakdown, in order of each room's first item. Each room
+    lists the positions of its items in the items array. With priced=True the
+    items already carry their line totals and are only aggregated.
+    """
+    quantity = _column(items, 'quantity')
+    if priced:
+        line_totals = _to_paise(_column(items, 'total_amount'))
+        line_costs = _to_paise(_column(items, 'total_company_cost'))
+    else:
+        line_totals = _to_paise(_column(items, 'offered_price') * quantity)
+        line_costs = _to_paise(_column(items, 'company_cost') * quantity)
+        for item, total, cost in zip(items, (line_totals / 100).tolist(), (line_costs / 100).tolist()):
+            item['total_amount'] = total
+            item['total_company_cost'] = cost
+
+    room_index = {}
+    room_codes = np.fromiter(
+        (room_index.setdefault(item['room_area'], len(room_index)) for item in items),
+        dtype=np.int64, count=len(items)
+    )
+    room_count = len(room_index)
+    room_items = np.bincount(room_codes, minlength=room_count)
+    room_quantity = np.bincount(room_codes, weights=quantity, minlength=room_count)
+    room_totals = np.zeros(room_count, dtype=np.int64)
+    room_costs = np.zeros(room_count, dtype=np.int64)
+    np.add.at(room_totals, room_codes, line_totals)
+    np.add.at(room_costs, room_codes, line_costs)
+    # A stable sort keeps each room's items in their original order
+    room_positions = np.split(np.argsort(room_codes, kind='stable'), np.cumsum(room_items)[:-1])
+
+    rooms = [
+        {
+            "room_area": room,
+            "item_count": int(room_items[i]),
+            "quantity": int(room_quantity[i]),
+            "subtotal": _money(_rupees(room_totals[i])),
+            "company_cost": _money(_rupees(room_costs[i])),
+            "margin": _money(_rupees(room_totals[i] - room_costs[i])),
+            "positions": room_positions[i].tolist()
+        }
+        for room, i in room_index.items()
+    ]
+    return {
+        "subtotal": int(line_totals.sum()),
+        "total_company_cost": int(line_costs.sum()),
+        "rooms": rooms
+    }
+
+
+def _document_totals(items: List[dict], discount: float, installation_charges: float,
+                     gst_percentage: float, priced: bool):
+    aggregates = price_items(items, priced)
+    subtotal = _rupees(aggregates["subtotal"])
+    net = subtotal - Decimal(str(discount))
+    total_before_gst = net + Decimal(str(installation_charges))
+    gst_amount = (total_before_gst * Decimal(str(gst_percentage)) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    total = total_before_gst + gst_amount
+    return aggregates, subtotal, net, gst_amount, total
+
+
+def quotation_totals(items: List[dict], overall_discount: float,
+                     installation_charges: float, gst_percentage: float, priced: bool = False) -> dict:
+    """Price the items in place and return the quotation's pricing fields"""
+    aggregates, subtotal, net_quote, gst_amount, total = _document_totals(
+        items, overall_discount, installation_charges, gst_percentage, priced
+    )
+    total_company_cost = _rupees(aggregates["total_company_cost"])
+    return {
+        "subtotal": _money(subtotal),
+        "net_quote": _money(net_quote),
+        "gst_amount": _money(gst_amount),
+        "total": _money(total),
+        "total_company_cost": _money(total_company_cost),
+        "profit_margin": _money(total - total_company_cost - gst_amount),
+        "rooms": aggregates["rooms"]
+    }
+
+
+def invoice_totals(items: List[dict], discount: float,
+                   installation_charges: float, gst_percentage: float) -> dict:
+    """Price the items in place and return the invoice's pricing fields"""
+    aggregates, subtotal, net_amount, gst_amount, total = _document_totals(
+        items, discount, installation_charges, gst_percentage, False
+    )
+    return {
+        "subtotal": _money(subtotal),
+        "net_amount": _money(net_amount),
+        "gst_amount": _money(gst_amount),
+        "total": _money(total),
+        "rooms": aggregates["rooms"]
+    }
+
+
+def room_breakdown(items: List[dict]) -> List[dict]:
+    """Per-room breakdown for documents saved before it was stored"""
+    return price_items([dict(item) for item in items])["rooms"]
@@ -0,0 +1,53 @@
+"""Stream a ZIP archive while its entries are still being produced.
+
+zipfile can write to an unseekable stream (it falls back to data
+descriptors), so the archive is written into a small buffer that is drained
+after every chunk. Only the chunk being copied is held in memory, never the
+whole archive.
+"""
+import asyncio
+import io
+import zipfile
+from pathlib import Path
+from typing import AsyncIterator, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _DrainableBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands written bytes back on drain()"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def zip_stream(entries: AsyncIterator[Tuple[str, Union[Path, bytes]]]) -> AsyncIterator[bytes]:
+    """Yield a ZIP of (name, file path or bytes) entries as they arrive"""
+    buffer = _DrainableBuffer()
+    # PDFs are already compressed, so entries are stored as is rather than deflated on the event loop
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        async for name, source in entries:
+            with archive.open(name, 'w') as dest:
+                if isinstance(source, bytes):
+                    dest.write(source)
+                else:
+                    with open(source, 'rb') as f:
+                        while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+                            dest.write(chunk)
+                            if data := buffer.drain():
+                                yield data
+            if data := buffer.drain():
+                yield data
+    yield buffer.drain()
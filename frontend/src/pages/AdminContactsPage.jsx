@@ -6,10 +6,18 @@ import { Card, CardContent } from '../components/ui/card';
 import { useToast } from '../hooks/use-toast';
 import { LogOut, Search, Download, Mail, Phone, Calendar, Filter, Eye, CheckCircle, Clock } from 'lucide-react';
 import axios from 'axios';
+import { fetchAllPages } from '../services/listService';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+const countByStatus = (contacts) => ({
+  total: contacts.length,
+  new: contacts.filter(c => c.status === 'new').length,
+  read: contacts.filter(c => c.status === 'read').length,
+  responded: contacts.filter(c => c.status === 'responded').length,
+});
+
 const AdminContactsPage = () => {
   const navigate = useNavigate();
   const { toast } = useToast();
@@ -17,6 +25,8 @@ const AdminContactsPage = () => {
   const [filteredContacts, setFilteredContacts] = useState([]);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
+  // Counted from the unfiltered list, so the stat cards ignore the status filter
+  const [statusCounts, setStatusCounts] = useState(countByStatus([]));
   const [selectedContact, setSelectedContact] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
 
@@ -27,16 +37,24 @@ const AdminContactsPage = () => {
       return;
     }
     fetchContacts();
-  }, [navigate]);
+  }, [navigate, statusFilter]);
 
   useEffect(() => {
     filterContacts();
-  }, [contacts, searchTerm, statusFilter]);
+  }, [contacts, searchTerm]);
 
   const fetchContacts = async () => {
     try {
-      const response = await axios.get(`${API}/contact`);
-      setContacts(response.data);
+      // The status filter runs on the server; every page for it is loaded
+      const filters = statusFilter !== 'all' ? { status: statusFilter } : {};
+      const result = await fetchAllPages(`${API}/contact`, undefined, filters);
+      if (!result.ok) {
+        throw new Error(`Failed to fetch contacts: ${result.status}`);
+      }
+      setContacts(result.items);
+      if (statusFilter === 'all') {
+        setStatusCounts(countByStatus(result.items));
+      }
       setIsLoading(false);
     } catch (error) {
       toast({
@@ -51,11 +69,6 @@ const AdminContactsPage = () => {
   const filterContacts = () => {
     let filtered = contacts;
 
-    // Filter by status
-    if (statusFilter !== 'all') {
-      filtered = filtered.filter(c => c.status === statusFilter);
-    }
-
     // Filter by search term
     if (searchTerm) {
       filtered = filtered.filter(c =>
@@ -87,9 +100,17 @@ const AdminContactsPage = () => {
         { headers: { Authorization: `Bearer ${token}` } }
       );
 
-      setContacts(contacts.map(c =>
-        c.id === contactId ? { ...c, status: newStatus } : c
-      ));
+      const previousStatus = contacts.find(c => c.id === contactId)?.status;
+      setContacts(contacts
+        .map(c => (c.id === contactId ? { ...c, status: newStatus } : c))
+        .filter(c => statusFilter === 'all' || c.status === statusFilter));
+      if (previousStatus && previousStatus !== newStatus) {
+        setStatusCounts(counts => ({
+          ...counts,
+          [previousStatus]: (counts[previousStatus] || 0) - 1,
+          [newStatus]: (counts[newStatus] || 0) + 1,
+        }));
+      }
 
       toast({
         title: 'Success',
@@ -192,7 +213,7 @@ const AdminContactsPage = () => {
                   <Mail className="text-blue-600" size={20} />
                 </div>
                 <div>
-                  <p className="text-2xl font-bold">{contacts.length}</p>
+                  <p className="text-2xl font-bold">{statusCounts.total}</p>
                   <p className="text-sm text-gray-600">Total Contacts</p>
                 </div>
               </div>
@@ -207,7 +228,7 @@ const AdminContactsPage = () => {
                 </div>
                 <div>
                   <p className="text-2xl font-bold">
-                    {contacts.filter(c => c.status === 'new').length}
+                    {statusCounts.new}
                   </p>
                   <p className="text-sm text-gray-600">New</p>
                 </div>
@@ -223,7 +244,7 @@ const AdminContactsPage = () => {
                 </div>
                 <div>
                   <p className="text-2xl font-bold">
-                    {contacts.filter(c => c.status === 'read').length}
+                    {statusCounts.read}
                   </p>
                   <p className="text-sm text-gray-600">Read</p>
                 </div>
@@ -239,7 +260,7 @@ const AdminContactsPage = () => {
                 </div>
                 <div>
                   <p className="text-2xl font-bold">
-                    {contacts.filter(c => c.status === 'responded').length}
+                    {statusCounts.responded}
                   </p>
                   <p className="text-sm text-gray-600">Responded</p>
                 </div>
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
+import { fetchAllPages } from '../services/listService';
 
 const AdminCreateInvoicePage = () => {
   const navigate = useNavigate();
@@ -53,12 +54,9 @@ const AdminCreateInvoicePage = () => {
   const fetchProducts = async () => {
     try {
       const token = localStorage.getItem('adminToken');
-      const response = await fetch(`${backendUrl}/api/products`, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      if (response.ok) {
-        const data = await response.json();
-        setProducts(data);
+      const result = await fetchAllPages(`${backendUrl}/api/products`, { 'Authorization': `Bearer ${token}` });
+      if (result.ok) {
+        setProducts(result.items);
       }
     } catch (error) {
       console.error('Error fetching products:', error);
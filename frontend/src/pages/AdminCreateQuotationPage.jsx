@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
+import { fetchAllPages } from '../services/listService';
 
 const AdminCreateQuotationPage = () => {
   const navigate = useNavigate();
@@ -57,12 +58,9 @@ const AdminCreateQuotationPage = () => {
   const fetchProducts = async () => {
     try {
       const token = localStorage.getItem('adminToken');
-      const response = await fetch(`${backendUrl}/api/products`, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
-      if (response.ok) {
-        const data = await response.json();
-        setProducts(data);
+      const result = await fetchAllPages(`${backendUrl}/api/products`, { 'Authorization': `Bearer ${token}` });
+      if (result.ok) {
+        setProducts(result.items);
       }
     } catch (error) {
       console.error('Error fetching products:', error);
@@ -1,8 +1,12 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { motion } from 'framer-motion';
+import { waitForEmailJob } from '../services/emailJobService';
+
+// Wait for typing to pause before searching
+const SEARCH_DEBOUNCE_MS = 300;
 
 const AdminInvoicesPage = () => {
   const navigate = useNavigate();
@@ -10,13 +14,21 @@ const AdminInvoicesPage = () => {
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterStatus, setFilterStatus] = useState('all');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const latestRequest = useRef(0);
   const backendUrl = process.env.REACT_APP_BACKEND_URL;
 
   useEffect(() => {
     checkAuth();
-    fetchInvoices();
   }, []);
 
+  // Search and status filtering run on the server; a change reloads from the first page
+  useEffect(() => {
+    const timer = setTimeout(() => fetchInvoices(), searchTerm ? SEARCH_DEBOUNCE_MS : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm, filterStatus]);
+
   const checkAuth = () => {
     const token = localStorage.getItem('adminToken');
     if (!token) {
@@ -24,10 +36,16 @@ const AdminInvoicesPage = () => {
     }
   };
 
-  const fetchInvoices = async () => {
+  const fetchInvoices = async (cursor = null) => {
+    const requestId = ++latestRequest.current;
     try {
       const token = localStorage.getItem('adminToken');
-      const response = await fetch(`${backendUrl}/api/invoices`, {
+      const params = new URLSearchParams();
+      if (cursor) params.set('cursor', cursor);
+      if (searchTerm.trim()) params.set('customer', searchTerm.trim());
+      if (filterStatus !== 'all') params.set('payment_status', filterStatus);
+      const query = params.toString() ? `?${params}` : '';
+      const response = await fetch(`${backendUrl}/api/invoices${query}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -35,7 +53,10 @@ const AdminInvoicesPage = () => {
       
       if (response.ok) {
         const data = await response.json();
-        setInvoices(data);
+        // Drop responses for a search or filter that has since changed
+        if (requestId !== latestRequest.current) return;
+        setInvoices(prev => (cursor ? [...prev, ...data] : data));
+        setNextCursor(response.headers.get('X-Next-Cursor'));
       } else if (response.status === 401) {
         navigate('/admin/login');
       }
@@ -46,6 +67,12 @@ const AdminInvoicesPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchInvoices(nextCursor);
+    setLoadingMore(false);
+  };
+
   const sendEmail = async (invoiceId) => {
     if (!window.confirm('Send this invoice to the customer via email?')) return;
     
@@ -65,15 +92,16 @@ const AdminInvoicesPage = () => {
       });
       
       if (response.ok) {
-        try {
-          const result = await response.json();
-          if (result.email_sent) {
-            alert('Invoice sent successfully via email!');
-          } else {
-            alert(`PDF generated but email failed:\n${result.error}\n\nPlease download and send manually.`);
-          }
-        } catch (e) {
-          alert('Invoice sent successfully!');
+        const result = await response.json();
+        const job = await waitForEmailJob(backendUrl, result.job_id, token);
+        if (job && job.status === 'sent') {
+          alert('Invoice sent successfully via email!');
+        } else if (job && job.status === 'dead') {
+          alert(`Email failed:\n${job.last_error}\n\nPlease download the PDF and send manually.`);
+        } else if (job && job.last_error) {
+          alert(`Email attempt failed and will be retried automatically:\n${job.last_error}`);
+        } else {
+          alert('Invoice queued for email delivery. It will be sent shortly.');
         }
         fetchInvoices();
       } else if (response.status === 401) {
@@ -172,14 +200,6 @@ const AdminInvoicesPage = () => {
     }
   };
 
-  const filteredInvoices = invoices.filter(inv => {
-    const matchesSearch = inv.customer_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                          inv.invoice_number.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                          inv.customer_email.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStatus = filterStatus === 'all' || inv.payment_status === filterStatus;
-    return matchesSearch && matchesStatus;
-  });
-
   const getStatusBadge = (status) => {
     const colors = {
       pending: 'bg-yellow-100 text-yellow-800',
@@ -268,7 +288,7 @@ const AdminInvoicesPage = () => {
               <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-orange-500 mx-auto"></div>
               <p className="mt-4 text-gray-600">Loading invoices...</p>
             </div>
-          ) : filteredInvoices.length === 0 ? (
+          ) : invoices.length === 0 ? (
             <div className="bg-white rounded-lg shadow p-12 text-center">
               <p className="text-gray-500 text-lg">No invoices found</p>
               <button
@@ -310,7 +330,7 @@ const AdminInvoicesPage = () => {
                   </tr>
                 </thead>
                 <tbody className="bg-white divide-y divide-gray-200">
-                  {filteredInvoices.map((invoice) => (
+                  {invoices.map((invoice) => (
                     <tr key={invoice.id} className="hover:bg-gray-50">
                       <td className="px-6 py-4 whitespace-nowrap">
                         <div className="text-sm font-medium text-gray-900">{invoice.invoice_number}</div>
@@ -370,6 +390,18 @@ const AdminInvoicesPage = () => {
               </table>
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <div className="text-center mt-6">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-6 py-2 border border-orange-500 text-orange-600 rounded-lg hover:bg-orange-50 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load More'}
+              </button>
+            </div>
+          )}
         </motion.div>
       </div>
       
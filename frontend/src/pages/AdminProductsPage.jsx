@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { motion } from 'framer-motion';
+import { fetchAllPages } from '../services/listService';
 
 const AdminProductsPage = () => {
   const navigate = useNavigate();
@@ -39,16 +40,13 @@ const AdminProductsPage = () => {
   const fetchProducts = async () => {
     try {
       const token = localStorage.getItem('adminToken');
-      const response = await fetch(`${backendUrl}/api/products`, {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
+      const result = await fetchAllPages(`${backendUrl}/api/products`, {
+        'Authorization': `Bearer ${token}`
       });
       
-      if (response.ok) {
-        const data = await response.json();
-        setProducts(data);
-      } else if (response.status === 401) {
+      if (result.ok) {
+        setProducts(result.items);
+      } else if (result.status === 401) {
         navigate('/admin/login');
       }
     } catch (error) {
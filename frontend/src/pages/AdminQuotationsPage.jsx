@@ -1,8 +1,12 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import { motion } from 'framer-motion';
+import { waitForEmailJob } from '../services/emailJobService';
+
+// Wait for typing to pause before searching
+const SEARCH_DEBOUNCE_MS = 300;
 
 const AdminQuotationsPage = () => {
   const navigate = useNavigate();
@@ -10,13 +14,21 @@ const AdminQuotationsPage = () => {
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterStatus, setFilterStatus] = useState('all');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const latestRequest = useRef(0);
   const backendUrl = process.env.REACT_APP_BACKEND_URL;
 
   useEffect(() => {
     checkAuth();
-    fetchQuotations();
   }, []);
 
+  // Search and status filtering run on the server; a change reloads from the first page
+  useEffect(() => {
+    const timer = setTimeout(() => fetchQuotations(), searchTerm ? SEARCH_DEBOUNCE_MS : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm, filterStatus]);
+
   const checkAuth = () => {
     const token = localStorage.getItem('adminToken');
     if (!token) {
@@ -24,10 +36,16 @@ const AdminQuotationsPage = () => {
     }
   };
 
-  const fetchQuotations = async () => {
+  const fetchQuotations = async (cursor = null) => {
+    const requestId = ++latestRequest.current;
     try {
       const token = localStorage.getItem('adminToken');
-      const response = await fetch(`${backendUrl}/api/quotations`, {
+      const params = new URLSearchParams();
+      if (cursor) params.set('cursor', cursor);
+      if (searchTerm.trim()) params.set('customer', searchTerm.trim());
+      if (filterStatus !== 'all') params.set('status', filterStatus);
+      const query = params.toString() ? `?${params}` : '';
+      const response = await fetch(`${backendUrl}/api/quotations${query}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -35,7 +53,10 @@ const AdminQuotationsPage = () => {
       
       if (response.ok) {
         const data = await response.json();
-        setQuotations(data);
+        // Drop responses for a search or filter that has since changed
+        if (requestId !== latestRequest.current) return;
+        setQuotations(prev => (cursor ? [...prev, ...data] : data));
+        setNextCursor(response.headers.get('X-Next-Cursor'));
       } else if (response.status === 401) {
         navigate('/admin/login');
       }
@@ -46,6 +67,12 @@ const AdminQuotationsPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchQuotations(nextCursor);
+    setLoadingMore(false);
+  };
+
   const sendEmail = async (quotationId) => {
     if (!window.confirm('Send this quotation to the customer via email?')) return;
     
@@ -65,15 +92,16 @@ const AdminQuotationsPage = () => {
       });
       
       if (response.ok) {
-        try {
-          const result = await response.json();
-          if (result.email_sent) {
-            alert('Quotation sent successfully via email!');
-          } else {
-            alert(`PDF generated but email failed:\n${result.error}\n\nPlease download and send manually.`);
-          }
-        } catch (e) {
-          alert('Quotation sent successfully!');
+        const result = await response.json();
+        const job = await waitForEmailJob(backendUrl, result.job_id, token);
+        if (job && job.status === 'sent') {
+          alert('Quotation sent successfully via email!');
+        } else if (job && job.status === 'dead') {
+          alert(`Email failed:\n${job.last_error}\n\nPlease download the PDF and send manually.`);
+        } else if (job && job.last_error) {
+          alert(`Email attempt failed and will be retried automatically:\n${job.last_error}`);
+        } else {
+          alert('Quotation queued for email delivery. It will be sent shortly.');
         }
         fetchQuotations();
       } else if (response.status === 401) {
@@ -172,14 +200,6 @@ const AdminQuotationsPage = () => {
     }
   };
 
-  const filteredQuotations = quotations.filter(q => {
-    const matchesSearch = q.customer_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                          q.quote_number.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                          q.customer_email.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStatus = filterStatus === 'all' || q.status === filterStatus;
-    return matchesSearch && matchesStatus;
-  });
-
   const getStatusBadge = (status) => {
     const colors = {
       draft: 'bg-gray-100 text-gray-800',
@@ -272,7 +292,7 @@ const AdminQuotationsPage = () => {
               <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-orange-500 mx-auto"></div>
               <p className="mt-4 text-gray-600">Loading quotations...</p>
             </div>
-          ) : filteredQuotations.length === 0 ? (
+          ) : quotations.length === 0 ? (
             <div className="bg-white rounded-lg shadow p-12 text-center">
               <p className="text-gray-500 text-lg">No quotations found</p>
               <button
@@ -311,7 +331,7 @@ const AdminQuotationsPage = () => {
                   </tr>
                 </thead>
                 <tbody className="bg-white divide-y divide-gray-200">
-                  {filteredQuotations.map((quotation) => (
+                  {quotations.map((quotation) => (
                     <tr key={quotation.id} className="hover:bg-gray-50">
                       <td className="px-6 py-4 whitespace-nowrap">
                         <div className="text-sm font-medium text-gray-900">{quotation.quote_number}</div>
@@ -323,6 +343,11 @@ const AdminQuotationsPage = () => {
                       </td>
                       <td className="px-6 py-4 whitespace-nowrap">
                         <div className="text-sm text-gray-900">₹ {quotation.total.toLocaleString()}</div>
+                        {quotation.rooms.length > 0 && (
+                          <div className="text-xs text-gray-500">
+                            {quotation.rooms.reduce((count, room) => count + room.item_count, 0)} items · {quotation.rooms.length} rooms
+                          </div>
+                        )}
                       </td>
                       <td className="px-6 py-4 whitespace-nowrap">
                         <div className="text-sm text-green-600">₹ {quotation.profit_margin.toLocaleString()}</div>
@@ -369,6 +394,18 @@ const AdminQuotationsPage = () => {
               </table>
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <div className="text-center mt-6">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-6 py-2 border border-orange-500 text-orange-600 rounded-lg hover:bg-orange-50 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load More'}
+              </button>
+            </div>
+          )}
         </motion.div>
       </div>
       
@@ -0,0 +1,24 @@
+// Send-email endpoints queue a job and return 202 with its id; delivery
+// happens in the background. Poll until the first attempt has finished.
+const POLL_INTERVAL_MS = 2000;
+const POLL_TIMEOUT_MS = 60000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+export const waitForEmailJob = async (backendUrl, jobId, token) => {
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await sleep(POLL_INTERVAL_MS);
+    const response = await fetch(`${backendUrl}/api/email-jobs/${jobId}`, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (!response.ok) {
+      return null;
+    }
+    const job = await response.json();
+    if (job.status === 'sent' || job.status === 'dead' || job.last_error) {
+      return job;
+    }
+  }
+  return null;
+};
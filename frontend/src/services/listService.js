@@ -0,0 +1,19 @@
+// List endpoints return one page at a time; the next page's cursor comes back
+// in the X-Next-Cursor header.
+const PAGE_SIZE = 200;
+
+export const fetchAllPages = async (url, headers, filters = {}) => {
+  let items = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ ...filters, limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${url}?${params}`, { headers });
+    if (!response.ok) {
+      return { ok: false, status: response.status, items };
+    }
+    items = items.concat(await response.json());
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return { ok: true, status: 200, items };
+};
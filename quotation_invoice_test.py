@@ -671,9 +671,11 @@ def test_email_sending():
                                    headers=headers)
             print(f"Send Quotation Email - Status: {response.status_code}")
             
-            if response.status_code == 200:
+            if response.status_code == 202:
                 data = response.json()
                 print(f"Response: {data.get('message')}")
+                job = requests.get(f"{BACKEND_URL}/email-jobs/{data['job_id']}", headers=headers)
+                print(f"Email job status: {job.json().get('status')}")
                 print("✅ Quotation email API working correctly")
             else:
                 print(f"❌ Failed to send quotation email: {response.text}")
@@ -695,9 +697,11 @@ def test_email_sending():
                                    headers=headers)
             print(f"Send Invoice Email - Status: {response.status_code}")
             
-            if response.status_code == 200:
+            if response.status_code == 202:
                 data = response.json()
                 print(f"Response: {data.get('message')}")
+                job = requests.get(f"{BACKEND_URL}/email-jobs/{data['job_id']}", headers=headers)
+                print(f"Email job status: {job.json().get('status')}")
                 print("✅ Invoice email API working correctly")
             else:
                 print(f"❌ Failed to send invoice email: {response.text}")